@@ -3,16 +3,20 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import os
 import queue as queue_module
 import random
+import re
 import shlex
 import threading
 import time as time_module
 from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field, replace
+from functools import partial
 from pathlib import Path
 from typing import Callable, Deque, Optional
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 import discord
 from discord import app_commands
@@ -26,6 +30,7 @@ from config import (
     MUSIC_ATTACHMENT_MAX_BYTES,
     MUSIC_DIRECTORY,
     MUSIC_QUEUE_MAX_SIZE,
+    MUSIC_SOUNDCLOUD_DOWNLOAD,
     MUSIC_STREAM_BUFFER_SECONDS,
     MUSIC_STREAM_RESTART_COOLDOWN_SECONDS,
     MUSIC_STREAM_STALL_TIMEOUT_SECONDS,
@@ -40,11 +45,19 @@ logger = logging.getLogger(__name__)
 MUSIC_DIRECTORY_PATH = Path(MUSIC_DIRECTORY)
 MUSIC_DIRECTORY_PATH.mkdir(parents=True, exist_ok=True)
 STREAM_SOURCE_MAX_AGE_SECONDS = 180
+NEXT_TRACK_PREWARM_LEAD_SECONDS = 30
+HOUSEKEEPING_INTERVAL_SECONDS = 2
+INACTIVITY_CHECK_INTERVAL_SECONDS = 300
+_INACTIVITY_CHECK_EVERY_TICKS = (
+    INACTIVITY_CHECK_INTERVAL_SECONDS // HOUSEKEEPING_INTERVAL_SECONDS
+)
+NEXT_TRACK_MIN_URL_LIFETIME_SECONDS = 120
 VOICE_STATE_SETTLE_SECONDS = 1.0
 PCM_FRAME_DURATION_SECONDS = 0.02
 PCM_FRAME_BYTES = 3840
 PCM_BYTES_PER_SECOND = PCM_FRAME_BYTES / PCM_FRAME_DURATION_SECONDS
 PCM_SILENCE_FRAME = b"\x00" * PCM_FRAME_BYTES
+OPUS_SILENCE_FRAME = b"\xf8\xff\xfe"
 
 
 # ----------------------------------------------------------------------------
@@ -53,12 +66,16 @@ PCM_SILENCE_FRAME = b"\x00" * PCM_FRAME_BYTES
 
 
 def format_duration(duration_seconds: float | int | None) -> str:
-    if duration_seconds is None:
-        return "00:00"
-    try:
-        total_seconds = int(float(duration_seconds))
-    except (TypeError, ValueError):
+    if isinstance(duration_seconds, int):
+        # yt-dlp usually reports whole seconds; skip the float round-trip.
+        total_seconds = duration_seconds
+    elif duration_seconds is None:
         return "00:00"
+    else:
+        try:
+            total_seconds = int(float(duration_seconds))
+        except (TypeError, ValueError, OverflowError):
+            return "00:00"
     if total_seconds < 1:
         return "00:00"
     hours, remainder = divmod(total_seconds, 3600)
@@ -68,14 +85,15 @@ def format_duration(duration_seconds: float | int | None) -> str:
     return f"{minutes:02d}:{seconds:02d}"
 
 
-def parse_time(time_str: str) -> int:
+_TIME_FORMAT_ERROR = "Invalid time format. Use seconds, MM:SS, or HH:MM:SS."
+
+
+def _parse_time_segments(time_str: str) -> int:
     parts = time_str.split(":")
     try:
         values = list(map(int, parts))
     except ValueError as exc:
-        raise ValueError(
-            "Invalid time format. Use seconds, MM:SS, or HH:MM:SS."
-        ) from exc
+        raise ValueError(_TIME_FORMAT_ERROR) from exc
     if any(value < 0 for value in values):
         raise ValueError("Time must be positive.")
     if len(values) == 1:
@@ -86,13 +104,64 @@ def parse_time(time_str: str) -> int:
     if len(values) == 3:
         hours, minutes, seconds = values
         return hours * 3600 + minutes * 60 + seconds
-    raise ValueError("Invalid time format. Use seconds, MM:SS, or HH:MM:SS.")
+    raise ValueError(_TIME_FORMAT_ERROR)
+
+
+def parse_time(time_str: str) -> int:
+    # Single pass over plain digits and colons: no split list, no int() per
+    # part. Anything else (spaces, signs, "_") goes through int() per segment
+    # so the accepted inputs stay exactly what int() accepts.
+    total = 0
+    value = 0
+    digits = 0
+    colons = 0
+    for char in time_str:
+        if "0" <= char <= "9":
+            value = value * 10 + ord(char) - 48
+            digits += 1
+        elif char == ":" and digits and colons < 2:
+            total = (total + value) * 60
+            value = 0
+            digits = 0
+            colons += 1
+        else:
+            return _parse_time_segments(time_str)
+    if not digits:
+        raise ValueError(_TIME_FORMAT_ERROR)
+    return total + value
 
 
 SOUNDCLOUD_DOMAINS = ("soundcloud.com", "on.soundcloud.com")
 SOUNDCLOUD_QUERY_PREFIXES = ("sc ", "soundcloud ")
 SOUNDCLOUD_QUERY_PREFIXES_WITH_COLON = ("sc:", "soundcloud:")
-YOUTUBE_DOMAINS = ("youtube.com", "youtu.be", "music.youtube.com")
+
+# Host checks run on every query: resolve the domain tuples once into exact-host
+# sets and dotted suffixes that str.endswith can test in a single C call.
+_SOUNDCLOUD_HOSTS = frozenset(SOUNDCLOUD_DOMAINS)
+_SOUNDCLOUD_HOST_SUFFIXES = tuple(f".{domain}" for domain in SOUNDCLOUD_DOMAINS)
+
+# Bare-domain and "sc:"/"soundcloud " prefix detection in normalize_audio_query,
+# each compiled into one alternation. The domain pattern is a substring search,
+# so subdomains of another listed domain ("on.soundcloud.com") add nothing.
+_SOUNDCLOUD_DOMAIN_RE = re.compile(
+    "|".join(
+        re.escape(domain)
+        for domain in sorted(
+            domain
+            for domain in _SOUNDCLOUD_HOSTS
+            if not domain.endswith(_SOUNDCLOUD_HOST_SUFFIXES)
+        )
+    )
+)
+_SOUNDCLOUD_QUERY_PREFIX_RE = re.compile(
+    "|".join(
+        re.escape(prefix)
+        for prefix in SOUNDCLOUD_QUERY_PREFIXES + SOUNDCLOUD_QUERY_PREFIXES_WITH_COLON
+    ),
+    re.IGNORECASE,
+)
+_ALLOWED_MEDIA_HOSTS = frozenset(MEDIA_ALLOWED_DOMAINS)
+_ALLOWED_MEDIA_HOST_SUFFIXES = tuple(f".{domain}" for domain in MEDIA_ALLOWED_DOMAINS)
 
 
 def _looks_like_url(query: str) -> bool:
@@ -100,6 +169,21 @@ def _looks_like_url(query: str) -> bool:
     return lowered.startswith(("http://", "https://"))
 
 
+# Scheme, optional ``user:pass@`` credentials, then the host up to the port
+# or the first path/query/fragment delimiter.
+_URL_HOST_RE = re.compile(r"^https?://(?:[^/?#]*@)?([^/?#:]*)", re.IGNORECASE)
+
+
+def _url_hostname(url: str) -> str:
+    """Return the lowercased host of an http(s) URL without ``urlparse``.
+
+    Only suitable for domain membership checks: credentials and the port are
+    dropped, nothing is validated.
+    """
+    match = _URL_HOST_RE.match(url)
+    return match.group(1).lower() if match else ""
+
+
 def _is_allowed_media_url(url: str) -> bool:
     """Restrict extractor URLs to explicitly trusted public media hosts."""
     if not _looks_like_url(url):
@@ -108,33 +192,17 @@ def _is_allowed_media_url(url: str) -> bool:
     hostname = (parsed.hostname or "").lower().rstrip(".")
     if not hostname or parsed.username or parsed.password:
         return False
-    return any(
-        hostname == domain or hostname.endswith(f".{domain}")
-        for domain in MEDIA_ALLOWED_DOMAINS
-    )
-
-
-def _is_youtube_url(url: str) -> bool:
-    if not _looks_like_url(url):
-        return False
-    parsed = urlparse(url)
-    hostname = (parsed.hostname or "").lower()
-    return any(
-        hostname == domain or hostname.endswith(f".{domain}")
-        for domain in YOUTUBE_DOMAINS
+    return hostname in _ALLOWED_MEDIA_HOSTS or hostname.endswith(
+        _ALLOWED_MEDIA_HOST_SUFFIXES
     )
 
 
-def _is_youtube_hls_entry(entry: dict) -> bool:
-    webpage_url = entry.get("webpage_url", "")
-    extractor = (entry.get("extractor") or "").lower()
+def _is_hls_entry(entry: dict) -> bool:
+    # Any extractor: SoundCloud's hls_opus/hls_mp3 formats need the same
+    # gentler reconnect profile as YouTube's HLS manifests.
     protocol = (entry.get("protocol") or "").lower()
     manifest_url = (entry.get("manifest_url") or "").lower()
     playback_url = (entry.get("url") or "").lower()
-
-    is_youtube = _is_youtube_url(webpage_url) or extractor in {"youtube", "youtube:tab"}
-    if not is_youtube:
-        return False
     return any(
         marker in value
         for value in (protocol, manifest_url, playback_url)
@@ -142,36 +210,38 @@ def _is_youtube_hls_entry(entry: dict) -> bool:
     )
 
 
+# FFmpeg demuxers for the containers yt-dlp hands out over plain HTTP(S).
+# Naming the demuxer up front skips FFmpeg's format probe on stream start.
+_FFMPEG_INPUT_FORMATS = {"webm": "matroska", "m4a": "mp4", "opus": "ogg"}
+
+
+def _ffmpeg_input_format(entry: dict) -> Optional[str]:
+    # HLS/DASH manifests go through their own demuxers; never force those.
+    if entry.get("protocol") not in ("http", "https"):
+        return None
+    return _FFMPEG_INPUT_FORMATS.get(entry.get("ext"))
+
+
 def normalize_audio_query(query: str) -> str:
     """Normalize user input to support explicit SoundCloud searches and URLs."""
     query = query.strip()
     if not query:
         return query
 
-    lowered = query.lower()
-
-    for prefix in SOUNDCLOUD_QUERY_PREFIXES:
-        if lowered.startswith(prefix):
-            rest = query[len(prefix) :].strip()
-            if rest:
-                return f"scsearch1:{rest}"
-            return query
-
-    for prefix in SOUNDCLOUD_QUERY_PREFIXES_WITH_COLON:
-        if lowered.startswith(prefix):
-            rest = query[len(prefix) :].strip()
-            if rest:
-                return f"scsearch1:{rest}"
-            return query
+    prefix_match = _SOUNDCLOUD_QUERY_PREFIX_RE.match(query)
+    if prefix_match:
+        rest = query[prefix_match.end() :].strip()
+        if rest:
+            return f"scsearch1:{rest}"
+        return query
 
+    lowered = query.lower()
     if lowered.startswith("scsearch"):
         return query
 
     if not _looks_like_url(query):
-        stripped_query = query[4:] if lowered.startswith("www.") else query
-        if " " not in stripped_query and any(
-            domain in stripped_query.lower() for domain in SOUNDCLOUD_DOMAINS
-        ):
+        stripped_query = lowered[4:] if lowered.startswith("www.") else lowered
+        if " " not in stripped_query and _SOUNDCLOUD_DOMAIN_RE.search(stripped_query):
             return f"https://{query}"
 
     return query
@@ -181,53 +251,151 @@ def is_soundcloud_query(query: str) -> bool:
     lowered = query.lower()
     if lowered.startswith("scsearch"):
         return True
+    # Every SoundCloud host contains the word; skip host parsing for the rest.
+    if "soundcloud" not in lowered:
+        return False
     if _looks_like_url(query):
-        parsed = urlparse(query)
-        hostname = (parsed.hostname or "").lower()
+        hostname = _url_hostname(query)
         if not hostname:
             return False
-        return any(
-            hostname == domain or hostname.endswith(f".{domain}")
-            for domain in SOUNDCLOUD_DOMAINS
+        return hostname in _SOUNDCLOUD_HOSTS or hostname.endswith(
+            _SOUNDCLOUD_HOST_SUFFIXES
         )
     return False
 
 
+# Argument sets for the no-seek case, built once per (profile, demuxer, user
+# agent). yt-dlp hands out only a handful of user agents, so the bound is
+# never reached in practice. Callers only unpack these dicts into the FFmpeg
+# source, never mutate them.
+_FFMPEG_BASE_ARGS_MAX_ENTRIES = 64
+_ffmpeg_base_args_cache: (
+    "OrderedDict[tuple[str, Optional[str], Optional[str]], dict[str, str]]"
+) = OrderedDict()
+
+
+def _ffmpeg_base_args(
+    before_key: str, input_format: Optional[str], user_agent: Optional[str]
+) -> dict[str, str]:
+    key = (before_key, input_format, user_agent)
+    args = _ffmpeg_base_args_cache.get(key)
+    if args is not None:
+        _ffmpeg_base_args_cache.move_to_end(key)
+        return args
+
+    before = FFMPEG_OPTIONS[before_key]
+    if input_format:
+        before = f"-f {input_format} {before}"
+    # Inject dynamic user agent if provided
+    if user_agent:
+        before += f" -user_agent {shlex.quote(user_agent)}"
+    args = {"before_options": before, "options": FFMPEG_OPTIONS["options"]}
+    _ffmpeg_base_args_cache[key] = args
+    while len(_ffmpeg_base_args_cache) > _FFMPEG_BASE_ARGS_MAX_ENTRIES:
+        _ffmpeg_base_args_cache.popitem(last=False)
+    return args
+
+
 def build_ffmpeg_options(
     stream: bool,
     *,
     seek: Optional[int] = None,
     user_agent: Optional[str] = None,
-    youtube_hls: bool = False,
+    hls: bool = False,
+    input_format: Optional[str] = None,
 ) -> dict[str, str]:
-    if stream:
-        before_key = (
-            "before_options_stream_youtube_hls"
-            if youtube_hls
-            else "before_options_stream"
-        )
-        before = FFMPEG_OPTIONS[before_key]
-        # Inject dynamic user agent if provided
-        if user_agent:
-            before += f" -user_agent {shlex.quote(user_agent)}"
+    if not stream:
+        before_key = "before_options_file"
+        user_agent = None
+        input_format = None
+    elif hls:
+        before_key = "before_options_stream_hls"
+        input_format = None
     else:
-        before = FFMPEG_OPTIONS["before_options_file"]
-
-    if seek is not None and seek > 0:
-        before = f"-ss {seek} {before}"
+        before_key = "before_options_stream"
+    base = _ffmpeg_base_args(before_key, input_format, user_agent or None)
+    if seek is None or seek <= 0:
+        return base
     return {
-        "before_options": before,
-        "options": FFMPEG_OPTIONS["options"],
+        "before_options": f"-ss {seek} {base['before_options']}",
+        "options": base["options"],
     }
 
 
 INFO_CACHE_TTL_SECONDS = 900
 INFO_CACHE_MAX_ENTRIES = 256
+# Signed media URLs stop working at their ``expire`` timestamp. Drop cached
+# extractions a little earlier so FFmpeg is never handed a dead URL.
+INFO_CACHE_EXPIRY_MARGIN_SECONDS = 60
+_SIGNED_URL_PATH_EXPIRY_RE = re.compile(r"/expire/(\d+)")
 _info_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_INFO_PLAYLIST_LIMIT_KEY = "_peacemusic_playlistend"
+# Bulky extractor fields nothing downstream reads; a full YouTube info dict is
+# mostly these, so drop them before an entry is pinned in the cache.
+_INFO_CACHE_DROPPED_KEYS = frozenset(
+    {
+        "automatic_captions",
+        "chapters",
+        "description",
+        "formats",
+        "heatmap",
+        "requested_formats",
+        "requested_subtitles",
+        "subtitles",
+        "thumbnails",
+    }
+)
+
+
+def _signed_url_expiry(url: Optional[str]) -> Optional[float]:
+    """Return the Unix time a signed media URL expires at, if it carries one."""
+    if not url or "expire" not in url:
+        return None
+    values = parse_qs(urlparse(url).query).get("expire")
+    if values:
+        raw_expiry = values[0]
+    else:
+        # HLS manifests encode their parameters as path segments.
+        match = _SIGNED_URL_PATH_EXPIRY_RE.search(url)
+        if match is None:
+            return None
+        raw_expiry = match.group(1)
+    try:
+        return float(raw_expiry)
+    except ValueError:
+        return None
+
+
+def _info_cache_ttl(data: dict) -> float:
+    ttl = float(INFO_CACHE_TTL_SECONDS)
+    now = time_module.time()
+    for entry in data.get("entries") or (data,):
+        if not entry:
+            continue
+        expiry = _signed_url_expiry(entry.get("url"))
+        if expiry is not None:
+            ttl = min(ttl, expiry - now - INFO_CACHE_EXPIRY_MARGIN_SECONDS)
+    return ttl
+
+
+def _slim_info(info: dict) -> dict:
+    slim = {
+        name: value
+        for name, value in info.items()
+        if name not in _INFO_CACHE_DROPPED_KEYS
+    }
+    entries = info.get("entries")
+    if entries:
+        slim["entries"] = [_slim_info(entry) if entry else entry for entry in entries]
+    return slim
 
 
 def _info_cache_set(key: str, data: dict) -> None:
-    _info_cache[key] = (time_module.monotonic(), data)
+    ttl = _info_cache_ttl(data)
+    if ttl <= 0:
+        _info_cache.pop(key, None)
+        return
+    _info_cache[key] = (time_module.monotonic() + ttl, _slim_info(data))
     _info_cache.move_to_end(key)
     while len(_info_cache) > INFO_CACHE_MAX_ENTRIES:
         _info_cache.popitem(last=False)
@@ -237,57 +405,203 @@ def _info_cache_get(key: str) -> Optional[dict]:
     cached = _info_cache.get(key)
     if not cached:
         return None
-    if (time_module.monotonic() - cached[0]) >= INFO_CACHE_TTL_SECONDS:
+    if time_module.monotonic() >= cached[0]:
         _info_cache.pop(key, None)
         return None
     _info_cache.move_to_end(key)
     return cached[1]
 
 
-def _create_ytdl() -> youtube_dl.YoutubeDL:
-    return youtube_dl.YoutubeDL(dict(YTDL_OPTIONS))
+def _info_cache_sweep() -> int:
+    """Drop expired entries that are never looked up again."""
+    now = time_module.monotonic()
+    expired = [key for key, (expires_at, _) in _info_cache.items() if now >= expires_at]
+    for key in expired:
+        del _info_cache[key]
+    return len(expired)
 
 
-def _create_search_ytdl() -> youtube_dl.YoutubeDL:
-    # Flat extraction lists search results without resolving each entry's
-    # formats (the slow part). For the search tool we only need
-    # title/url/duration/uploader, so skip format processing entirely.
-    opts = dict(YTDL_OPTIONS)
-    opts["extract_flat"] = "in_playlist"
-    opts.pop("format", None)
-    return youtube_dl.YoutubeDL(opts)
+def _info_satisfies_limit(info: dict, max_entries: Optional[int]) -> bool:
+    """Whether a cached extraction holds every entry the caller may need."""
+    if info.get("entries") is None:
+        return True
+    cached_limit = info.get(_INFO_PLAYLIST_LIMIT_KEY)
+    if cached_limit is None:
+        return True
+    return max_entries is not None and max(1, max_entries) <= cached_limit
+
+
+def _cache_extracted_info(
+    key: str, data: dict, *, max_entries: Optional[int] = None
+) -> None:
+    """Cache a streaming extraction under its query and its canonical URL.
+
+    Playlist results remember the ``playlistend`` they were fetched with, so a
+    later request for fewer entries (the queue only has room for fewer) is
+    served from the cache instead of re-extracting. A single-video result is
+    also stored under its ``webpage_url``, which is the query used when the
+    same track is played again or requeued.
+    """
+    if data.get("entries") is not None and max_entries is not None:
+        data = {**data, _INFO_PLAYLIST_LIMIT_KEY: max(1, max_entries)}
+    _info_cache_set(key, data)
+    entries = data.get("entries")
+    if entries is None:
+        entry = data
+    elif len(entries) == 1 and entries[0]:
+        entry = entries[0]
+    else:
+        return
+    webpage_url = entry.get("webpage_url")
+    alias_key = f"1:{webpage_url}"
+    if webpage_url and alias_key != key:
+        _info_cache_set(alias_key, entry)
 
 
-def _extract_info_sync(
-    url: str, *, download: bool, max_entries: Optional[int] = None
-) -> dict:
-    options = dict(YTDL_OPTIONS)
-    if max_entries is not None:
-        options["playlistend"] = max(1, max_entries)
-    return youtube_dl.YoutubeDL(options).extract_info(url, download=download)
+# yt-dlp calls block for seconds on network I/O. Run them on their own small
+# pool so they cannot starve the loop's default executor (and vice versa).
+YTDL_EXECUTOR_MAX_WORKERS = 2
+_ytdl_executor: Optional[ThreadPoolExecutor] = None
 
 
-def _prepare_filename(entry: dict) -> str:
-    return _create_ytdl().prepare_filename(entry)
+def _get_ytdl_executor() -> ThreadPoolExecutor:
+    global _ytdl_executor
+    if _ytdl_executor is None:
+        _ytdl_executor = ThreadPoolExecutor(
+            max_workers=YTDL_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="ytdl",
+        )
+    return _ytdl_executor
 
 
-async def _probe_info(
-    url: str, *, loop: Optional[asyncio.AbstractEventLoop] = None
+def _shutdown_ytdl_executor() -> None:
+    global _ytdl_executor
+    executor, _ytdl_executor = _ytdl_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Downloaded files are deleted on one background thread: clearing a queue can
+# unlink dozens of them, and a slow disk would otherwise stall the event loop.
+_cleanup_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.warning("Failed to delete downloaded track %s", path, exc_info=True)
+
+
+def _schedule_unlink(path: str) -> None:
+    global _cleanup_executor
+    if _cleanup_executor is None:
+        _cleanup_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="music-cleanup",
+        )
+    _cleanup_executor.submit(_unlink_quietly, path)
+
+
+def _shutdown_cleanup_executor() -> None:
+    global _cleanup_executor
+    if _cleanup_executor is not None:
+        # Let already scheduled deletions finish; just stop accepting new ones.
+        _cleanup_executor.shutdown(wait=False)
+        _cleanup_executor = None
+
+
+async def _attachment_audio_codec(path: Path) -> Optional[str]:
+    """Return ``"opus"`` when an uploaded file can be played without decoding."""
+    suffix = path.suffix.lower()
+    if suffix == ".opus":
+        return "opus"
+    if suffix != ".ogg":
+        return None
+    # Ogg also carries Vorbis and FLAC; Discord voice messages are Ogg Opus.
+    try:
+        codec, _bitrate = await discord.FFmpegOpusAudio.probe(str(path))
+    except Exception as exc:
+        logger.debug("Failed to probe attachment codec for %s: %s", path, exc)
+        return None
+    return codec
+
+
+# Extractions currently running, keyed like the info cache. A second request
+# for the same query awaits the first one instead of hitting yt-dlp again.
+_ytdl_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _run_ytdl_shared(
+    key: str,
+    func: Callable[[], dict],
+    *,
+    loop: asyncio.AbstractEventLoop,
 ) -> dict:
-    """Быстрое получение метаданных без скачивания, с кэшем."""
-    loop = loop or asyncio.get_running_loop()
-    cache_key = f"1:{url}"
-    cached = _info_cache_get(cache_key)
-    if cached is not None:
-        return cached
+    future = _ytdl_inflight.get(key)
+    if future is None or future.done() or future.get_loop() is not loop:
+        future = loop.run_in_executor(_get_ytdl_executor(), func)
+        _ytdl_inflight[key] = future
 
-    start = time_module.monotonic()
-    data = await loop.run_in_executor(
-        None, lambda: _extract_info_sync(url, download=False)
+        def _forget(done: asyncio.Future) -> None:
+            if _ytdl_inflight.get(key) is done:
+                del _ytdl_inflight[key]
+
+        future.add_done_callback(_forget)
+    # Shield so one cancelled caller does not cancel the others' lookup.
+    return await asyncio.shield(future)
+
+
+# Building a YoutubeDL loads every extractor class and a new HTTP opener. The
+# instances are not safe to share between threads, so each executor worker
+# (and the event loop thread) keeps its own and reuses it for every call.
+_thread_ytdl_clients = threading.local()
+
+
+def _get_ytdl() -> youtube_dl.YoutubeDL:
+    client = getattr(_thread_ytdl_clients, "default", None)
+    if client is None:
+        client = youtube_dl.YoutubeDL(dict(YTDL_OPTIONS))
+        _thread_ytdl_clients.default = client
+    return client
+
+
+def _get_search_ytdl() -> youtube_dl.YoutubeDL:
+    client = getattr(_thread_ytdl_clients, "search", None)
+    if client is None:
+        # Flat extraction lists search results without resolving each entry's
+        # formats (the slow part). For the search tool we only need
+        # title/url/duration/uploader, so skip format processing entirely.
+        opts = dict(YTDL_OPTIONS)
+        opts["extract_flat"] = "in_playlist"
+        opts.pop("format", None)
+        client = youtube_dl.YoutubeDL(opts)
+        _thread_ytdl_clients.search = client
+    return client
+
+
+def _extract_info_sync(
+    url: str, *, download: bool, max_entries: Optional[int] = None
+) -> dict:
+    client = _get_ytdl()
+    # The client is reused, so reset the per-call playlist limit every time.
+    client.params["playlistend"] = (
+        max(1, max_entries)
+        if max_entries is not None
+        else YTDL_OPTIONS.get("playlistend")
     )
-    _info_cache_set(cache_key, data)
-    logger.debug("yt_dlp probe took %.2fs for %s", time_module.monotonic() - start, url)
-    return data
+    return client.extract_info(url, download=download)
+
+
+def _extract_flat_info_sync(url: str) -> dict:
+    # Resolve the client here, on the worker, so it is that thread's instance.
+    return _get_search_ytdl().extract_info(url, download=False)
+
+
+def _prepare_filename(entry: dict) -> str:
+    return _get_ytdl().prepare_filename(entry)
 
 
 async def _probe_info_flat(
@@ -301,8 +615,8 @@ async def _probe_info_flat(
         return cached
 
     start = time_module.monotonic()
-    data = await loop.run_in_executor(
-        None, lambda: _create_search_ytdl().extract_info(url, download=False)
+    data = await _run_ytdl_shared(
+        cache_key, partial(_extract_flat_info_sync, url), loop=loop
     )
     _info_cache_set(cache_key, data)
     logger.debug(
@@ -332,6 +646,7 @@ class _BufferedAudioSource(discord.AudioSource):
         underrun_grace_seconds: float,
         on_source_frame: Optional[Callable[[], None]] = None,
         on_played_frame: Optional[Callable[[bytes], None]] = None,
+        silence_frame: bytes = PCM_SILENCE_FRAME,
     ) -> None:
         self.source = source
         self.label = label
@@ -346,6 +661,7 @@ class _BufferedAudioSource(discord.AudioSource):
         self._frames: queue_module.Queue[bytes] = queue_module.Queue(maxsize=max_frames)
         self._on_source_frame = on_source_frame
         self._on_played_frame = on_played_frame
+        self._silence_frame = silence_frame
         self._ready = threading.Event()
         self._source_ended = threading.Event()
         self._closed = threading.Event()
@@ -376,6 +692,10 @@ class _BufferedAudioSource(discord.AudioSource):
     def volume(self, value: float) -> None:
         if hasattr(self.source, "volume"):
             self.source.volume = value
+        elif value != 1.0 and not self.is_opus():
+            # Sources start unscaled at unity gain; wrap on the first change.
+            # The producer picks up the new attribute on its next read.
+            self.source = discord.PCMVolumeTransformer(self.source, volume=value)
 
     @property
     def buffered_seconds(self) -> float:
@@ -427,7 +747,7 @@ class _BufferedAudioSource(discord.AudioSource):
                 self.underrun_count += 1
                 logger.warning("Audio buffer underrun for %s", self.label)
             if now - self._underrun_since <= self._underrun_grace_seconds:
-                return PCM_SILENCE_FRAME
+                return self._silence_frame
             logger.error(
                 "Audio buffer underrun grace expired for %s after %.1fs",
                 self.label,
@@ -471,9 +791,8 @@ class YTDLSource(discord.PCMVolumeTransformer):
         *,
         data: dict,
         stream: bool,
-        local_path: Optional[Path] = None,
+        local_path: Optional[str] = None,
         volume: float = 1.0,
-        on_chunk: Optional[Callable[[], None]] = None,
     ):
         super().__init__(source, volume)
         self.data = data
@@ -485,16 +804,10 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.duration = data.get("duration")
         self.local_path = local_path
         self.is_stream = stream
-        self.is_youtube_hls = _is_youtube_hls_entry(data)
+        self.is_hls = _is_hls_entry(data)
         self.user_agent = data.get("http_headers", {}).get("User-Agent")
-        self._on_chunk = on_chunk
-
-    def read(self) -> bytes:
-        data = super().read()
-        if data and self._on_chunk:
-            with contextlib.suppress(Exception):
-                self._on_chunk()
-        return data
+        self.acodec = data.get("acodec")
+        self.input_format = _ffmpeg_input_format(data)
 
     @classmethod
     async def from_url(
@@ -503,79 +816,75 @@ class YTDLSource(discord.PCMVolumeTransformer):
         *,
         loop: Optional[asyncio.AbstractEventLoop] = None,
         stream: bool = True,
-        on_chunk: Optional[Callable[[], None]] = None,
-        start_at: Optional[int] = None,
         volume: float = 1.0,
-        defer_audio: bool = False,
         max_entries: Optional[int] = None,
         force_refresh: bool = False,
     ) -> list["YTDLSource"]:
         loop = loop or asyncio.get_running_loop()
 
-        cache_key = f"{int(stream)}:{max_entries or 0}:{url}"
+        cache_key = f"{int(stream)}:{url}"
         use_cache = stream
         cached = _info_cache_get(cache_key) if use_cache and not force_refresh else None
+        if cached is not None and not _info_satisfies_limit(cached, max_entries):
+            cached = None
 
         if cached is not None:
             data = cached
             logger.debug("yt_dlp extract_info cache hit for %s", url)
         else:
             start_time = time_module.monotonic()
-            data = await loop.run_in_executor(
-                None,
-                lambda: _extract_info_sync(
-                    url, download=not stream, max_entries=max_entries
-                ),
+            extract = partial(
+                _extract_info_sync,
+                url,
+                download=not stream,
+                max_entries=max_entries,
             )
+            if use_cache:
+                # A lookup for more entries must not join a smaller one.
+                inflight_key = (
+                    cache_key
+                    if max_entries is None
+                    else f"{cache_key}:{max(1, max_entries)}"
+                )
+                data = await _run_ytdl_shared(inflight_key, extract, loop=loop)
+            else:
+                data = await loop.run_in_executor(_get_ytdl_executor(), extract)
             elapsed = time_module.monotonic() - start_time
             if use_cache:
-                _info_cache_set(cache_key, data)
+                _cache_extracted_info(cache_key, data, max_entries=max_entries)
             logger.debug("yt_dlp extract_info took %.2fs for %s", elapsed, url)
 
         entries = data.get("entries") or [data]
+        if max_entries is not None:
+            entries = entries[: max(1, max_entries)]
 
         sources: list[YTDLSource] = []
         for entry in entries:
             if not entry:
                 continue
 
-            local_path: Optional[Path] = None
+            local_path: Optional[str] = None
             if stream:
-                playback_target = entry.get("url")
-                if not playback_target:
+                if not entry.get("url"):
                     continue
-                http_headers = entry.get("http_headers", {})
-                dynamic_user_agent = http_headers.get("User-Agent")
             else:
-                filename = _prepare_filename(entry)
-                local_path = Path(filename)
-                playback_target = str(local_path)
-                dynamic_user_agent = None
+                local_path = _prepare_filename(entry)
 
-            if defer_audio:
-                audio_source = _DeferredAudioSource()
-            else:
-                ffmpeg_args = build_ffmpeg_options(
-                    stream,
-                    seek=start_at,
-                    user_agent=dynamic_user_agent,
-                    youtube_hls=_is_youtube_hls_entry(entry),
-                )
-                audio_source = discord.FFmpegPCMAudio(playback_target, **ffmpeg_args)
+            # Only metadata here: the FFmpeg process is spawned when the track
+            # is about to play, so a long playlist never forks one per entry.
             sources.append(
                 cls(
-                    audio_source,
+                    _DeferredAudioSource(),
                     data=entry,
                     stream=stream,
                     local_path=local_path,
                     volume=volume,
-                    on_chunk=on_chunk,
                 )
             )
         return sources
 
 
-@dataclass
+@dataclass(slots=True)
 class QueuedTrack:
     source: discord.AudioSource
     title: str
@@ -585,17 +894,19 @@ class QueuedTrack:
     thumbnail: Optional[str] = None
     uploader: Optional[str] = None
     duration: Optional[int] = None
-    local_path: Optional[Path] = None
+    local_path: Optional[str] = None
     user_agent: Optional[str] = None
     channel: Optional[discord.abc.Messageable] = None
     reload_query: Optional[str] = None
     should_stream: bool = True
-    is_youtube_hls: bool = False
+    is_hls: bool = False
+    acodec: Optional[str] = None
+    input_format: Optional[str] = None
     prepared_at_monotonic: float = field(default_factory=time_module.monotonic)
     source_prepared: bool = True
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UserNotificationResult:
     text: str
     user_notified: bool = False
@@ -650,15 +961,18 @@ class Music(commands.Cog):
         self.loop_mode = "off"
         self._replay_track: Optional[QueuedTrack] = None
         self._volume = 1.0
+        self._prewarm_task: Optional[asyncio.Task[None]] = None
+        self._housekeeping_ticks = 0
+        self._background_sends: set[asyncio.Task[bool]] = set()
 
         if self._guild_id is None:
-            self.check_for_inactivity.start()
-            self.monitor_stalled_playback.start()
+            self.housekeeping_loop.start()
 
     def cog_unload(self) -> None:
-        self.check_for_inactivity.cancel()
-        self.monitor_stalled_playback.cancel()
+        self.housekeeping_loop.cancel()
+        _shutdown_ytdl_executor()
         for player in self._guild_players.values():
+            player._cancel_next_track_prewarm()
             player._cleanup_queue()
             source_owned_by_player = bool(
                 player.voice_client
@@ -670,6 +984,7 @@ class Music(commands.Cog):
                 player.current,
                 cleanup_source=not source_owned_by_player,
             )
+        _shutdown_cleanup_executor()
 
     def _player_for_message(self, message: discord.Message) -> "Music":
         """Return isolated playback state for the message's guild."""
@@ -737,20 +1052,12 @@ class Music(commands.Cog):
                 track.source.cleanup()
         if not track.local_path:
             return
-        try:
-            track.local_path.unlink()
-        except FileNotFoundError:
-            pass
-        except OSError:
-            logger.warning(
-                "Failed to delete downloaded track %s", track.local_path, exc_info=True
-            )
+        _schedule_unlink(track.local_path)
         track.local_path = None
 
     def _cleanup_queue(self) -> None:
-        for track in list(self.queue):
-            self._cleanup_track_file(track)
-        self.queue.clear()
+        while self.queue:
+            self._cleanup_track_file(self.queue.popleft())
 
     def _discard_prepared_track(
         self,
@@ -765,8 +1072,7 @@ class Music(commands.Cog):
             prepared_track.local_path
             and prepared_track.local_path != original_track.local_path
         ):
-            with contextlib.suppress(FileNotFoundError, OSError):
-                prepared_track.local_path.unlink()
+            _schedule_unlink(prepared_track.local_path)
 
     def _result(
         self, text: str, *, user_notified: bool = False
@@ -928,6 +1234,7 @@ class Music(commands.Cog):
             return False
 
     def _track_background_send(self, task: asyncio.Task[bool]) -> None:
+        self._background_sends.discard(task)
         with contextlib.suppress(asyncio.CancelledError):
             exc = task.exception()
             if exc is not None:
@@ -943,6 +1250,8 @@ class Music(commands.Cog):
         task = asyncio.create_task(
             self._safe_channel_send(channel, content=content, embed=embed)
         )
+        # The loop only keeps weak references to tasks; hold on to it until done.
+        self._background_sends.add(task)
         task.add_done_callback(self._track_background_send)
 
     def _touch_audio_heartbeat(self) -> None:
@@ -955,7 +1264,14 @@ class Music(commands.Cog):
         self._played_audio_seconds += len(data) / PCM_BYTES_PER_SECOND
         self._touch_audio_heartbeat()
 
+    def _record_played_opus_frame(self, _data: bytes) -> None:
+        self._played_audio_seconds += PCM_FRAME_DURATION_SECONDS
+        self._touch_audio_heartbeat()
+
     def _reset_playback_timers(self) -> None:
+        # Stop, skip, disconnect and inactivity cleanup all end playback here;
+        # a prewarm timed against the old track must not keep sleeping.
+        self._cancel_next_track_prewarm()
         self._track_start_monotonic = None
         self._paused_at_monotonic = None
         self._playback_base_seconds = 0.0
@@ -999,27 +1315,31 @@ class Music(commands.Cog):
 
     def _create_local_track_source(
         self,
-        file_path: Path,
+        file_path: str,
         *,
         seek: Optional[int] = None,
-        on_chunk: Optional[Callable[[], None]] = None,
+        acodec: Optional[str] = None,
     ) -> discord.AudioSource:
         ffmpeg_args = build_ffmpeg_options(stream=False, seek=seek)
-        audio_source = discord.FFmpegPCMAudio(str(file_path), **ffmpeg_args)
-        transformer = discord.PCMVolumeTransformer(audio_source, volume=self._volume)
-        original_read = transformer.read
+        source: discord.AudioSource
+        if acodec == "opus" and self._volume == 1.0:
+            # Same passthrough as for streams: remux, never decode.
+            source = discord.FFmpegOpusAudio(file_path, codec="copy", **ffmpeg_args)
+            record_frame = self._record_played_opus_frame
+        else:
+            audio_source = discord.FFmpegPCMAudio(file_path, **ffmpeg_args)
+            source = discord.PCMVolumeTransformer(audio_source, volume=self._volume)
+            record_frame = self._record_played_audio_frame
+        original_read = source.read
 
         def _read_with_heartbeat() -> bytes:
             data = original_read()
             if data:
-                self._record_played_audio_frame(data)
-                if on_chunk is not None:
-                    with contextlib.suppress(Exception):
-                        on_chunk()
+                record_frame(data)
             return data
 
-        transformer.read = _read_with_heartbeat  # type: ignore[assignment]
-        return transformer
+        source.read = _read_with_heartbeat  # type: ignore[assignment]
+        return source
 
     def _create_stream_track_source(
         self,
@@ -1033,19 +1353,40 @@ class Music(commands.Cog):
             stream=True,
             seek=seek,
             user_agent=track.user_agent,
-            youtube_hls=track.is_youtube_hls,
+            hls=track.is_hls,
+            input_format=track.input_format,
+        )
+        buffer_options = {
+            "label": track.title,
+            "max_buffer_seconds": MUSIC_STREAM_BUFFER_SECONDS,
+            "start_buffer_seconds": MUSIC_STREAM_START_BUFFER_SECONDS,
+            "start_timeout_seconds": MUSIC_STREAM_START_TIMEOUT_SECONDS,
+            "underrun_grace_seconds": MUSIC_STREAM_UNDERRUN_GRACE_SECONDS,
+            "on_source_frame": self._touch_stream_input_heartbeat,
+        }
+        if track.acodec == "opus" and self._volume == 1.0:
+            # Already Opus and no gain to apply: remux the packets instead of
+            # decoding to PCM and re-encoding every frame in-process.
+            opus_source = discord.FFmpegOpusAudio(
+                track.stream_url, codec="copy", **ffmpeg_args
+            )
+            return _BufferedAudioSource(
+                opus_source,
+                on_played_frame=self._record_played_opus_frame,
+                silence_frame=OPUS_SILENCE_FRAME,
+                **buffer_options,
+            )
+        audio_source: discord.AudioSource = discord.FFmpegPCMAudio(
+            track.stream_url, **ffmpeg_args
         )
-        audio_source = discord.FFmpegPCMAudio(track.stream_url, **ffmpeg_args)
-        transformer = discord.PCMVolumeTransformer(audio_source, volume=self._volume)
+        if self._volume != 1.0:
+            audio_source = discord.PCMVolumeTransformer(
+                audio_source, volume=self._volume
+            )
         return _BufferedAudioSource(
-            transformer,
-            label=track.title,
-            max_buffer_seconds=MUSIC_STREAM_BUFFER_SECONDS,
-            start_buffer_seconds=MUSIC_STREAM_START_BUFFER_SECONDS,
-            start_timeout_seconds=MUSIC_STREAM_START_TIMEOUT_SECONDS,
-            underrun_grace_seconds=MUSIC_STREAM_UNDERRUN_GRACE_SECONDS,
-            on_source_frame=self._touch_stream_input_heartbeat,
+            audio_source,
             on_played_frame=self._record_played_audio_frame,
+            **buffer_options,
         )
 
     def _build_queued_track(
@@ -1071,7 +1412,9 @@ class Music(commands.Cog):
             channel=channel,
             reload_query=src.webpage_url or fallback_query,
             should_stream=should_stream,
-            is_youtube_hls=src.is_youtube_hls,
+            is_hls=src.is_hls,
+            acodec=src.acodec,
+            input_format=src.input_format,
             source_prepared=not isinstance(src.original, _DeferredAudioSource),
         )
 
@@ -1119,12 +1462,12 @@ class Music(commands.Cog):
     ) -> bool:
         seek_seconds = max(0, seek or 0)
 
-        if track.local_path and track.local_path.exists():
+        if track.local_path and os.path.exists(track.local_path):
             old_source = track.source
             new_source = self._create_local_track_source(
                 track.local_path,
                 seek=seek_seconds or None,
-                on_chunk=self._touch_audio_heartbeat,
+                acodec=track.acodec,
             )
             track.source = new_source
             if cleanup_existing:
@@ -1164,9 +1507,7 @@ class Music(commands.Cog):
             target_query,
             loop=self.bot.loop,
             stream=track.should_stream,
-            start_at=seek_seconds or None,
             volume=self._volume,
-            defer_audio=True,
             force_refresh=True,
         )
         if not sources:
@@ -1182,8 +1523,10 @@ class Music(commands.Cog):
         track.uploader = metadata_source.uploader or track.uploader
         track.duration = metadata_source.duration or track.duration
         track.local_path = metadata_source.local_path
-        track.is_youtube_hls = metadata_source.is_youtube_hls
+        track.is_hls = metadata_source.is_hls
         track.user_agent = metadata_source.user_agent
+        track.acodec = metadata_source.acodec
+        track.input_format = metadata_source.input_format
         if follow_playback_progress:
             seek_seconds = max(0, self._current_progress_seconds() - 2)
         if track.should_stream:
@@ -1195,7 +1538,7 @@ class Music(commands.Cog):
             prepared_source = self._create_local_track_source(
                 track.local_path,
                 seek=seek_seconds or None,
-                on_chunk=self._touch_audio_heartbeat,
+                acodec=track.acodec,
             )
         else:
             return False
@@ -1207,10 +1550,73 @@ class Music(commands.Cog):
         track.source_prepared = True
 
         if old_local_path and old_local_path != track.local_path:
-            with contextlib.suppress(FileNotFoundError, OSError):
-                old_local_path.unlink()
+            _schedule_unlink(old_local_path)
         return True
 
+    def _cancel_next_track_prewarm(self) -> None:
+        if self._prewarm_task is not None and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+        self._prewarm_task = None
+
+    def _schedule_next_track_prewarm(self) -> None:
+        self._cancel_next_track_prewarm()
+        current = self.current
+        # The queue may still be empty: the usual flow is to queue the next
+        # track while this one plays, and the task re-checks after its sleep.
+        if not current or not current.duration:
+            return
+        self._prewarm_task = asyncio.create_task(self._prewarm_next_track(current))
+
+    def _next_track_needs_prewarm(self, track: QueuedTrack) -> bool:
+        if not track.should_stream or not track.reload_query:
+            return False
+        if not track.stream_url:
+            return True
+        age_at_start = (
+            time_module.monotonic()
+            - track.prepared_at_monotonic
+            + NEXT_TRACK_PREWARM_LEAD_SECONDS
+        )
+        if age_at_start > STREAM_SOURCE_MAX_AGE_SECONDS:
+            return True
+        expires_at = _signed_url_expiry(track.stream_url)
+        return (
+            expires_at is not None
+            and expires_at < time_module.time() + NEXT_TRACK_MIN_URL_LIFETIME_SECONDS
+        )
+
+    async def _prewarm_next_track(self, current: QueuedTrack) -> None:
+        """Resolve the next stream shortly before the current track ends."""
+        remaining = (current.duration or 0) - self._current_progress_seconds()
+        await asyncio.sleep(max(0, remaining - NEXT_TRACK_PREWARM_LEAD_SECONDS))
+        if self.current is not current or not self.queue:
+            return
+        track = self.queue[0]
+        if not self._next_track_needs_prewarm(track):
+            return
+        try:
+            sources = await YTDLSource.from_url(
+                track.reload_query,
+                loop=self.bot.loop,
+                stream=True,
+                volume=self._volume,
+                force_refresh=True,
+            )
+        except Exception as exc:
+            logger.debug("Failed to prewarm next track %s: %s", track.title, exc)
+            return
+        # The track may have started (and refreshed itself) while we waited.
+        if not sources or not self.queue or self.queue[0] is not track:
+            return
+        metadata_source = sources[0]
+        track.stream_url = metadata_source.url
+        track.user_agent = metadata_source.user_agent
+        track.is_hls = metadata_source.is_hls
+        track.acodec = metadata_source.acodec
+        track.input_format = metadata_source.input_format
+        track.prepared_at_monotonic = time_module.monotonic()
+        logger.debug("Prewarmed stream URL for %s", track.title)
+
     async def _play_track(
         self,
         track: QueuedTrack,
@@ -1266,6 +1672,7 @@ class Music(commands.Cog):
 
         logger.info("Now playing: %s", track.title)
         self._mark_playback_started(start_at=start_at)
+        self._schedule_next_track_prewarm()
 
         if track.channel:
             embed = self._build_track_embed(track, color=color, description=description)
@@ -1334,9 +1741,21 @@ class Music(commands.Cog):
         return skipped_title
 
     def _after_playback(self, error: Optional[Exception]) -> None:
-        asyncio.run_coroutine_threadsafe(
+        future = asyncio.run_coroutine_threadsafe(
             self._handle_after_playback(error), self.bot.loop
         )
+        future.add_done_callback(self._log_after_playback_failure)
+
+    def _log_after_playback_failure(self, future: Future[None]) -> None:
+        # Nobody awaits this future, so an error would otherwise vanish.
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error(
+                "Failed to advance playback after a track ended",
+                exc_info=(type(exc), exc, exc.__traceback__),
+            )
 
     async def _handle_after_playback(self, error: Optional[Exception]) -> None:
         async with self._play_lock:
@@ -1383,7 +1802,7 @@ class Music(commands.Cog):
     async def _requeue_lazy(self, track: QueuedTrack) -> None:
         requeued = False
         try:
-            if track.local_path and track.local_path.exists():
+            if track.local_path and os.path.exists(track.local_path):
                 new_track = QueuedTrack(
                     source=_DeferredAudioSource(),
                     title=track.title,
@@ -1398,7 +1817,7 @@ class Music(commands.Cog):
                     channel=track.channel,
                     reload_query=track.reload_query,
                     should_stream=track.should_stream,
-                    is_youtube_hls=track.is_youtube_hls,
+                    is_hls=track.is_hls,
                     source_prepared=False,
                 )
                 self.queue.append(new_track)
@@ -1414,21 +1833,19 @@ class Music(commands.Cog):
                 target_query,
                 loop=self.bot.loop,
                 stream=track.should_stream,
-                on_chunk=self._touch_audio_heartbeat,
                 volume=self._volume,
-                defer_audio=True,
                 max_entries=MUSIC_QUEUE_MAX_SIZE - len(self.queue),
             )
-            for src in sources:
-                self.queue.append(
-                    self._build_queued_track(
-                        src,
-                        requester=track.requester,
-                        channel=track.channel,
-                        fallback_query=target_query,
-                        should_stream=track.should_stream,
-                    )
+            self.queue.extend(
+                self._build_queued_track(
+                    src,
+                    requester=track.requester,
+                    channel=track.channel,
+                    fallback_query=target_query,
+                    should_stream=track.should_stream,
                 )
+                for src in sources
+            )
             requeued = bool(sources)
             if requeued:
                 track.local_path = None
@@ -1517,6 +1934,69 @@ class Music(commands.Cog):
                     )
                     return
                 self._mark_playback_started(start_at=seek_seconds)
+                self._schedule_next_track_prewarm()
+
+    async def _rebuild_current_track_for_volume(self) -> bool:
+        """Restart the current track on a source that can apply ``_volume``."""
+        async with self._play_lock:
+            voice_client = self.voice_client
+            current_track = self.current
+            if (
+                not voice_client
+                or not current_track
+                or (not voice_client.is_playing() and not voice_client.is_paused())
+            ):
+                return False
+            seek_seconds = self._current_progress_seconds()
+            prepared_track = replace(current_track)
+
+        try:
+            refreshed = await self._refresh_track_source(
+                prepared_track,
+                seek=seek_seconds,
+                cleanup_existing=False,
+            )
+        except Exception:
+            self._discard_prepared_track(prepared_track, current_track)
+            logger.warning(
+                "Failed to rebuild %s for a volume change",
+                current_track.title,
+                exc_info=True,
+            )
+            return False
+        if not refreshed:
+            self._discard_prepared_track(prepared_track, current_track)
+            return False
+
+        async with self._play_lock:
+            if (
+                current_track is not self.current
+                or voice_client is not self.voice_client
+                or not voice_client.is_connected()
+                or (not voice_client.is_playing() and not voice_client.is_paused())
+            ):
+                self._discard_prepared_track(prepared_track, current_track)
+                return False
+            was_paused = voice_client.is_paused()
+            self._stop_voice_client_for_replace()
+            self.current = prepared_track
+            try:
+                voice_client.play(prepared_track.source, after=self._after_playback)
+            except Exception:
+                self.current = None
+                self._reset_playback_timers()
+                self._discard_prepared_track(prepared_track, current_track)
+                logger.exception(
+                    "Failed to resume playback after a volume change for %s",
+                    current_track.title,
+                )
+                return False
+            self._mark_playback_started(start_at=seek_seconds)
+            self._schedule_next_track_prewarm()
+            if was_paused:
+                voice_client.pause()
+                self._paused_at_monotonic = time_module.monotonic()
+        return True
 
     def _build_track_embed(
         self,
@@ -1628,14 +2108,19 @@ class Music(commands.Cog):
                     "Домен источника не разрешён", user_notified=notified
                 )
 
-            # Hybrid strategy:
-            # - SoundCloud: Download (stability)
-            # - YouTube/Others: Stream (speed)
-            is_soundcloud = is_soundcloud_query(normalized_query)
-            should_stream = not is_soundcloud
+            # Everything streams by default: the buffered source, FFmpeg
+            # reconnect flags and stale-URL refresh cover network hiccups.
+            # MUSIC_SOUNDCLOUD_DOWNLOAD restores the old download-first
+            # behaviour for hosts where SoundCloud streams prove flaky.
+            download_soundcloud = MUSIC_SOUNDCLOUD_DOWNLOAD and is_soundcloud_query(
+                normalized_query
+            )
+            should_stream = not download_soundcloud
 
             status_text = (
-                "Скачиваю трек с SoundCloud..." if is_soundcloud else "Ищу трек..."
+                "Скачиваю трек с SoundCloud..."
+                if download_soundcloud
+                else "Ищу трек..."
             )
             msg = await self._safe_reply_message(message, content=status_text)
 
@@ -1644,9 +2129,7 @@ class Music(commands.Cog):
                     normalized_query,
                     loop=self.bot.loop,
                     stream=should_stream,
-                    on_chunk=self._touch_audio_heartbeat,
                     volume=self._volume,
-                    defer_audio=True,
                     max_entries=MUSIC_QUEUE_MAX_SIZE - len(self.queue),
                 )
             except DownloadError as exc:
@@ -1698,8 +2181,7 @@ class Music(commands.Cog):
             remaining_slots = MUSIC_QUEUE_MAX_SIZE - len(self.queue)
             tracks = tracks[:remaining_slots]
 
-            for track in tracks:
-                self.queue.append(track)
+            self.queue.extend(tracks)
 
             # Check if we are starting playback immediately
             will_play_immediately = (
@@ -1777,9 +2259,13 @@ class Music(commands.Cog):
             )
 
             try:
-                await attachment.save(file_path)
+                data = await attachment.read()
+                if len(data) <= MUSIC_ATTACHMENT_MAX_BYTES:
+                    # Writing up to the size limit would block the voice loop.
+                    await asyncio.to_thread(file_path.write_bytes, data)
             except Exception as exc:
                 logger.warning("Failed to save attachment %s: %s", safe_filename, exc)
+                _schedule_unlink(str(file_path))
                 notified = await self._safe_reply(
                     message, content="Ошибка сохранения файла"
                 )
@@ -1788,9 +2274,7 @@ class Music(commands.Cog):
                     user_notified=notified,
                 )
 
-            if file_path.stat().st_size > MUSIC_ATTACHMENT_MAX_BYTES:
-                with contextlib.suppress(OSError):
-                    file_path.unlink()
+            if len(data) > MUSIC_ATTACHMENT_MAX_BYTES:
                 notified = await self._safe_reply(
                     message, content="Аудиофайл превышает допустимый размер."
                 )
@@ -1803,10 +2287,11 @@ class Music(commands.Cog):
                 source=_DeferredAudioSource(),
                 title=safe_filename,
                 requester=message.author,
-                local_path=file_path,
+                local_path=str(file_path),
                 webpage_url=attachment.url,
                 channel=message.channel,
                 should_stream=False,
+                acodec=await _attachment_audio_codec(file_path),
                 source_prepared=False,
             )
 
@@ -1863,9 +2348,10 @@ class Music(commands.Cog):
             if self.current and lowercase_query in self.current.title.lower():
                 skipped_title = await self._skip_current_track()
             else:
-                for track in list(self.queue):
+                for index, track in enumerate(self.queue):
                     if lowercase_query in track.title.lower():
-                        self.queue.remove(track)
+                        # Safe: we stop iterating right after the delete.
+                        del self.queue[index]
                         self._cleanup_track_file(track)
                         removed_track = track
                         break
@@ -2076,6 +2562,7 @@ class Music(commands.Cog):
                     )
                 else:
                     self._mark_playback_started(start_at=seconds)
+                    self._schedule_next_track_prewarm()
                     if was_paused:
                         voice_client.pause()
                         self._paused_at_monotonic = time_module.monotonic()
@@ -2375,11 +2862,25 @@ class Music(commands.Cog):
             self._volume = level
             voice_client = self.voice_client
             source = getattr(voice_client, "source", None)
-            if source is not None and hasattr(source, "volume"):
+            is_opus = getattr(source, "is_opus", None)
+            passthrough = callable(is_opus) and is_opus()
+            current_track = self.current
+            # Remuxed Opus passthrough has no PCM to scale: the track has to
+            # be rebuilt on the PCM path at its current position instead.
+            rebuild_for_gain = (
+                passthrough
+                and level != 1.0
+                and current_track is not None
+                and (current_track.stream_url or current_track.local_path) is not None
+            )
+            if source is not None and hasattr(source, "volume") and not passthrough:
                 source.volume = level
                 active_source_updated = True
             else:
-                active_source_updated = False
+                # Passthrough already plays at unity gain, so 100% is in effect.
+                active_source_updated = passthrough and level == 1.0
+        if rebuild_for_gain:
+            active_source_updated = await self._rebuild_current_track_for_volume()
         if not voice_client:
             notified = await self._safe_reply(
                 message,
@@ -2586,10 +3087,31 @@ class Music(commands.Cog):
     # ------------------------------------------------------------------
     # Housekeeping
     # ------------------------------------------------------------------
-    @tasks.loop(seconds=2)
-    async def monitor_stalled_playback(self) -> None:
-        for player in list(self._guild_players.values()):
-            await player._monitor_stalled_playback_once()
+    @tasks.loop(seconds=HOUSEKEEPING_INTERVAL_SECONDS)
+    async def housekeeping_loop(self) -> None:
+        """Single timer for stall detection and the slower inactivity sweep."""
+        check_inactivity = self._housekeeping_ticks % _INACTIVITY_CHECK_EVERY_TICKS == 0
+        self._housekeeping_ticks += 1
+        if check_inactivity:
+            _info_cache_sweep()
+        players = list(self._guild_players.values())
+        # One guild's failure must not end the loop for every other guild.
+        for player in players:
+            try:
+                await player._monitor_stalled_playback_once()
+            except Exception:
+                logger.exception("Stall check failed for guild %s", player._guild_id)
+        if not check_inactivity:
+            return
+        # Inactivity checks wait on each player's lock, so they run only after
+        # every guild's stall check for this tick is done.
+        for player in players:
+            try:
+                await player._check_for_inactivity_once()
+            except Exception:
+                logger.exception(
+                    "Inactivity check failed for guild %s", player._guild_id
+                )
 
     async def _monitor_stalled_playback_once(self) -> None:
         if not self.voice_client or not self.current:
@@ -2630,15 +3152,10 @@ class Music(commands.Cog):
             )
             await self._restart_current_stream()
 
-    @monitor_stalled_playback.before_loop
-    async def before_monitor_stalled_playback(self) -> None:
+    @housekeeping_loop.before_loop
+    async def before_housekeeping_loop(self) -> None:
         await self.bot.wait_until_ready()
 
-    @tasks.loop(minutes=5)
-    async def check_for_inactivity(self) -> None:
-        for player in list(self._guild_players.values()):
-            await player._check_for_inactivity_once()
-
     async def _check_for_inactivity_once(self) -> None:
         async with self._play_lock:
             now = time_module.monotonic()
@@ -2713,10 +3230,6 @@ class Music(commands.Cog):
             self._replay_track = None
             self._reset_playback_timers()
 
-    @check_for_inactivity.before_loop
-    async def before_check_for_inactivity(self) -> None:
-        await self.bot.wait_until_ready()
-
     @commands.Cog.listener()
     async def on_voice_state_update(
         self,
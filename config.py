@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -18,19 +19,25 @@ _FALLBACK_PROMPT = (
 )
 
 
+# One ``KEY=value`` assignment per line; comment lines and lines without a
+# key never match. ``[^\S\n]`` is horizontal whitespace (including ``\r``).
+_ENV_LINE_RE = re.compile(
+    r"^[^\S\n]*([^#=\s][^=\n]*?)[^\S\n]*=[^\S\n]*([^\n]*?)[^\S\n]*$",
+    re.MULTILINE,
+)
+
+
 def _load_env_file(path: Path = DEFAULT_ENV_FILE) -> None:
-    if not path.exists():
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return
 
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        if not key:
-            continue
-        value = value.strip().strip('"').strip("'")
+    for match in _ENV_LINE_RE.finditer(text):
+        key, value = match.groups()
+        # Only a matching pair of quotes delimits a value: "it's" stays intact.
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
         os.environ.setdefault(key, value)
 
 
@@ -129,14 +136,14 @@ def _validate_cookie_file(path: Path) -> None:
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DiscordSettings:
     token: str
     chatbot_channel_id: Optional[int]
     intents: discord.Intents
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GeminiSettings:
     api_key: str
     response_model: str = "gemini-3.1-flash-lite"
@@ -154,7 +161,7 @@ class GeminiSettings:
         return self.response_model
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MemorySettings:
     db_file: Path
     recent_messages_limit: int
@@ -167,7 +174,7 @@ class MemorySettings:
     raw_retention_days: int = 90
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MiscSettings:
     music_directory: Path
     status_message: str
@@ -184,7 +191,7 @@ class MiscSettings:
     require_mention_when_unscoped: bool = True
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AudioSettings:
     ytdl_options: dict
     ffmpeg_options: dict
@@ -195,9 +202,10 @@ class AudioSettings:
     stream_underrun_grace_seconds: float
     stream_stall_timeout_seconds: float
     stream_restart_cooldown_seconds: float
+    soundcloud_download: bool = False
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppSettings:
     discord: DiscordSettings
     gemini: GeminiSettings
@@ -254,6 +262,10 @@ def _build_ytdl_options(
         "noplaylist": True,
         "ignoreerrors": False,
         "logtostderr": False,
+        # Screen output and progress bars are formatted and written on every
+        # extraction; nobody reads them. Warnings still reach stderr.
+        "quiet": True,
+        "noprogress": True,
         "default_search": "auto",
         "force_ipv4": False,
         # YouTube increasingly requires an external JS challenge solver.
@@ -281,7 +293,7 @@ def _build_ffmpeg_options(*, rw_timeout_seconds: float) -> dict:
     - threads 1: Prevent thread contention on single core.
     - rw_timeout: Fail a stalled CDN read early enough for the PCM buffer to
       hide source refresh latency.
-    - reconnect: Separate policies for generic streams and YouTube HLS.
+    - reconnect: Separate policies for progressive streams and HLS.
 
     ``-bufsize`` is intentionally absent: it controls encoder rate control,
     not decoded PCM buffering. Playback jitter is handled by the bounded
@@ -295,7 +307,7 @@ def _build_ffmpeg_options(*, rw_timeout_seconds: float) -> dict:
         f"-rw_timeout {rw_timeout_microseconds} "
         "-err_detect ignore_err "
     )
-    youtube_hls_reconnect_args = (
+    hls_reconnect_args = (
         "-reconnect 1 -reconnect_delay_max 2 "
         "-reconnect_on_network_error 1 "
         "-reconnect_max_retries 5 -reconnect_delay_total_max 15 "
@@ -305,15 +317,9 @@ def _build_ffmpeg_options(*, rw_timeout_seconds: float) -> dict:
 
     return {
         "before_options_stream": f"{reconnect_args} -nostdin",
-        "before_options_stream_youtube_hls": (f"{youtube_hls_reconnect_args} -nostdin"),
+        "before_options_stream_hls": f"{hls_reconnect_args} -nostdin",
         "before_options_file": "-nostdin",
-        "options": (
-            "-vn -sn -dn "
-            "-probesize 2048k "
-            "-analyzeduration 0 "  # Speed up startup
-            "-threads 1 "
-            "-loglevel warning"
-        ),
+        "options": "-vn -sn -dn -threads 1 -loglevel warning",
     }
 
 
@@ -406,7 +412,7 @@ def load_settings() -> AppSettings:
         _validate_cookie_file(candidate)
         cookies_file = candidate
     prompt_file: Optional[Path] = None
-    prompt_text = _load_default_prompt()
+    prompt_text: Optional[str] = None
     if prompt_file_raw:
         candidate = Path(prompt_file_raw)
         if not candidate.is_absolute():
@@ -418,6 +424,9 @@ def load_settings() -> AppSettings:
                 prompt_text = loaded_text
         except (FileNotFoundError, OSError):
             pass
+    if prompt_text is None:
+        # Only read the bundled prompt when no custom one replaces it.
+        prompt_text = _load_default_prompt()
 
     rate_limit_max_requests = _get_env_int("AI_RATE_LIMIT_MAX_REQUESTS", 20)
     rate_limit_window_seconds = _get_env_float("AI_RATE_LIMIT_WINDOW_SECONDS", 60.0)
@@ -470,6 +479,7 @@ def load_settings() -> AppSettings:
         "MUSIC_STREAM_RESTART_COOLDOWN_SECONDS", 10.0
     )
     ffmpeg_rw_timeout_seconds = _get_env_float("MUSIC_FFMPEG_RW_TIMEOUT_SECONDS", 8.0)
+    soundcloud_download = _get_env_bool("MUSIC_SOUNDCLOUD_DOWNLOAD", default=False)
 
     _require_range(
         "MUSIC_STREAM_BUFFER_SECONDS", stream_buffer_seconds, minimum=2, maximum=60
@@ -556,6 +566,7 @@ def load_settings() -> AppSettings:
         stream_underrun_grace_seconds=stream_underrun_grace_seconds,
         stream_stall_timeout_seconds=stream_stall_timeout_seconds,
         stream_restart_cooldown_seconds=stream_restart_cooldown_seconds,
+        soundcloud_download=soundcloud_download,
     )
 
     return AppSettings(
@@ -616,6 +627,7 @@ MUSIC_STREAM_START_TIMEOUT_SECONDS = _settings.audio.stream_start_timeout_second
 MUSIC_STREAM_UNDERRUN_GRACE_SECONDS = _settings.audio.stream_underrun_grace_seconds
 MUSIC_STREAM_STALL_TIMEOUT_SECONDS = _settings.audio.stream_stall_timeout_seconds
 MUSIC_STREAM_RESTART_COOLDOWN_SECONDS = _settings.audio.stream_restart_cooldown_seconds
+MUSIC_SOUNDCLOUD_DOWNLOAD = _settings.audio.soundcloud_download
 MUSIC_QUEUE_MAX_SIZE = _settings.misc.queue_max_size
 AI_ATTACHMENT_MAX_BYTES = _settings.misc.ai_attachment_max_bytes
 MUSIC_ATTACHMENT_MAX_BYTES = _settings.misc.music_attachment_max_bytes
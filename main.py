@@ -98,16 +98,19 @@ async def _run() -> None:
 
 def main() -> None:
     try:
-        asyncio.run(_run())
+        import uvloop
+    except ImportError:
+        # Windows, or a minimal install: the stdlib loop works, just slower.
+        run = asyncio.run
+    else:
+        # uvloop.install() swaps the global policy, which is deprecated on
+        # Python 3.12+; uvloop.run() scopes the faster loop to this call.
+        run = uvloop.run
+    try:
+        run(_run())
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt received, shutting down")
 
 
 if __name__ == "__main__":
-    try:
-        import uvloop
-
-        uvloop.install()
-    except ImportError:
-        pass
     main()
@@ -171,6 +171,18 @@ def _install_discord_stub() -> None:
             self.source = source
             self.options = kwargs
 
+    class FFmpegOpusAudio(AudioSource):
+        def __init__(self, source, **kwargs):
+            self.source = source
+            self.options = kwargs
+
+        @classmethod
+        async def probe(cls, source, **kwargs):
+            return None, None
+
+        def is_opus(self):
+            return True
+
     class Color:
         @classmethod
         def purple(cls):
@@ -238,6 +250,7 @@ def _install_discord_stub() -> None:
     discord_module.AudioSource = AudioSource
     discord_module.PCMVolumeTransformer = PCMVolumeTransformer
     discord_module.FFmpegPCMAudio = FFmpegPCMAudio
+    discord_module.FFmpegOpusAudio = FFmpegOpusAudio
     discord_module.VoiceClient = type("VoiceClient", (), {})
     discord_module.Color = Color
     discord_module.Embed = type("Embed", (), {})
@@ -48,6 +48,8 @@ class ConfigTests(unittest.TestCase):
             settings.audio.ytdl_options["js_runtimes"],
             {"deno": {}, "node": {}},
         )
+        self.assertTrue(settings.audio.ytdl_options["quiet"])
+        self.assertNotIn("verbose", settings.audio.ytdl_options)
         self.assertEqual(settings.audio.stream_buffer_seconds, 20.0)
         self.assertEqual(settings.audio.stream_start_buffer_seconds, 5.0)
         self.assertEqual(settings.audio.stream_stall_timeout_seconds, 10.0)
@@ -71,6 +73,23 @@ class ConfigTests(unittest.TestCase):
             ):
                 load_project_module("test_config_module_invalid_buffer", "config.py")
 
+    def test_soundcloud_download_is_opt_in(self) -> None:
+        mock_env = {"DISCORD_BOT_TOKEN": "test_token", "GEMINI_API_KEY": "test_key"}
+
+        with patch.dict(os.environ, mock_env, clear=True):
+            config_module = load_project_module(
+                "test_config_module_soundcloud", "config.py"
+            )
+            default_settings = config_module.load_settings()
+        with patch.dict(
+            os.environ, {**mock_env, "MUSIC_SOUNDCLOUD_DOWNLOAD": "true"}, clear=True
+        ):
+            enabled_settings = config_module.load_settings()
+
+        self.assertFalse(default_settings.audio.soundcloud_download)
+        self.assertFalse(config_module.MUSIC_SOUNDCLOUD_DOWNLOAD)
+        self.assertTrue(enabled_settings.audio.soundcloud_download)
+
     def test_load_settings_enables_cookiefile_only_when_requested(self) -> None:
         with tempfile.TemporaryDirectory() as temporary_directory:
             cookie_path = Path(temporary_directory) / "cookies.txt"
@@ -120,3 +139,68 @@ class ConfigTests(unittest.TestCase):
             settings = config_module.load_settings()
 
         self.assertEqual(settings.gemini.socks_proxy, "socks5://127.0.0.1:40000")
+
+    def test_load_env_file_parses_assignments_without_overriding_env(self) -> None:
+        mock_env = {
+            "DISCORD_BOT_TOKEN": "test_token",
+            "GEMINI_API_KEY": "test_key",
+        }
+        env_text = (
+            "# comment=ignored\r\n"
+            '  QUOTED = " spaced " \r\n'
+            "SINGLE='x'\n"
+            'APOSTROPHE="it\'s"\n'
+            "NESTED='\"x\"'\n"
+            "\n"
+            "NO_ASSIGNMENT\n"
+            "=no-key\n"
+            "WITH_HASH=a=b # kept\n"
+            "GEMINI_API_KEY=from-file\n"
+        )
+
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            env_path = Path(temporary_directory) / ".env"
+            env_path.write_text(env_text, encoding="utf-8")
+            with patch.dict(os.environ, mock_env, clear=True):
+                config_module = load_project_module(
+                    "test_config_module_env_file", "config.py"
+                )
+                config_module._load_env_file(env_path)
+                loaded = dict(os.environ)
+
+        self.assertEqual(loaded["QUOTED"], " spaced ")
+        self.assertEqual(loaded["SINGLE"], "x")
+        self.assertEqual(loaded["APOSTROPHE"], "it's")
+        self.assertEqual(loaded["NESTED"], '"x"')
+        self.assertEqual(loaded["WITH_HASH"], "a=b # kept")
+        self.assertEqual(loaded["GEMINI_API_KEY"], "test_key")
+        self.assertNotIn("NO_ASSIGNMENT", loaded)
+        self.assertNotIn("# comment", loaded)
+        self.assertNotIn("", loaded)
+
+    def test_custom_prompt_file_skips_reading_the_default_prompt(self) -> None:
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            prompt_path = Path(temporary_directory) / "prompt.txt"
+            prompt_path.write_text("Custom prompt", encoding="utf-8")
+            mock_env = {
+                "DISCORD_BOT_TOKEN": "test_token",
+                "GEMINI_API_KEY": "test_key",
+                "BOT_PROMPT_FILE": str(prompt_path),
+            }
+
+            with patch.dict(os.environ, mock_env, clear=True):
+                config_module = load_project_module(
+                    "test_config_module_prompt", "config.py"
+                )
+                with patch.object(
+                    config_module, "_load_default_prompt", return_value="Default"
+                ) as load_default:
+                    settings = config_module.load_settings()
+                    load_default.assert_not_called()
+
+                    prompt_path.unlink()
+                    fallback = config_module.load_settings()
+
+        self.assertEqual(settings.misc.prompt_text, "Custom prompt")
+        self.assertEqual(settings.misc.prompt_file, prompt_path)
+        self.assertEqual(fallback.misc.prompt_text, "Default")
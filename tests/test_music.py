@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import os
+import tempfile
 import threading
 import unittest
+from collections import OrderedDict
+from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -24,17 +27,40 @@ class MusicHelperTests(unittest.TestCase):
         self.assertEqual(music_module.format_duration(65), "01:05")
         self.assertEqual(music_module.format_duration(3661), "01:01:01")
         self.assertEqual(music_module.format_duration("bad"), "00:00")
+        self.assertEqual(music_module.format_duration(61.9), "01:01")
+        self.assertEqual(music_module.format_duration(float("inf")), "00:00")
         self.assertEqual(music_module.parse_time("1:02:03"), 3723)
-        with self.assertRaises(ValueError):
-            music_module.parse_time("1:bad")
+        self.assertEqual(music_module.parse_time("1:05"), 65)
+        for invalid in ("1:bad", "", "1:", "1:2:3:4"):
+            with self.assertRaises(ValueError):
+                music_module.parse_time(invalid)
         with self.assertRaises(ValueError):
             music_module.parse_time("-1")
+        # Segments keep accepting whatever int() accepts.
+        self.assertEqual(music_module.parse_time(" 1: 30"), 90)
+        self.assertEqual(music_module.parse_time("+5"), 5)
+        self.assertEqual(music_module.parse_time("1_0"), 10)
+        with self.assertRaisesRegex(ValueError, "positive"):
+            music_module.parse_time("1:-5")
 
     def test_query_normalization_and_domain_allowlist(self) -> None:
         self.assertEqual(
             music_module.normalize_audio_query("sc: artist song"),
             "scsearch1:artist song",
         )
+        self.assertEqual(
+            music_module.normalize_audio_query("SoundCloud  lo-fi beats"),
+            "scsearch1:lo-fi beats",
+        )
+        self.assertEqual(music_module.normalize_audio_query("sc:"), "sc:")
+        self.assertEqual(
+            music_module.normalize_audio_query("www.SoundCloud.com/artist/track"),
+            "https://www.SoundCloud.com/artist/track",
+        )
+        self.assertEqual(
+            music_module.normalize_audio_query("soundcloud.com fan mix"),
+            "soundcloud.com fan mix",
+        )
         self.assertTrue(
             music_module.is_soundcloud_query(
                 music_module.normalize_audio_query("sc song")
@@ -48,10 +74,294 @@ class MusicHelperTests(unittest.TestCase):
             music_module._is_allowed_media_url("https://youtube.com@example.org/x")
         )
 
+    def test_soundcloud_url_detection_ignores_credentials_and_port(self) -> None:
+        self.assertTrue(
+            music_module.is_soundcloud_query("https://M.SoundCloud.com:443/artist")
+        )
+        self.assertTrue(
+            music_module.is_soundcloud_query("https://user@soundcloud.com?x=1")
+        )
+        self.assertFalse(
+            music_module.is_soundcloud_query("https://soundcloud.com.evil.org/x")
+        )
+        self.assertFalse(
+            music_module.is_soundcloud_query("https://example.org/soundcloud.com")
+        )
+
+    def test_info_cache_ttl_stops_before_signed_url_expiry(self) -> None:
+        now = 1_000_000.0
+        soon = {
+            "url": f"https://rr1.googlevideo.com/videoplayback?expire={now + 120:.0f}"
+        }
+        expired = {
+            "url": f"https://manifest.googlevideo.com/api/expire/{now - 5:.0f}/index"
+        }
+        unsigned = {"url": "https://cf-media.sndcdn.com/track.mp3"}
+
+        with (
+            patch.object(music_module, "_info_cache", OrderedDict()),
+            patch.object(music_module.time_module, "time", return_value=now),
+        ):
+            self.assertEqual(music_module._info_cache_ttl(soon), 60)
+            self.assertEqual(
+                music_module._info_cache_ttl(unsigned),
+                music_module.INFO_CACHE_TTL_SECONDS,
+            )
+            self.assertEqual(
+                music_module._info_cache_ttl({"entries": [unsigned, soon]}), 60
+            )
+            music_module._info_cache_set("expired", expired)
+            self.assertIsNone(music_module._info_cache_get("expired"))
+            music_module._info_cache_set("soon", soon)
+            self.assertEqual(music_module._info_cache_get("soon"), soon)
+
+    def test_info_cache_sweep_drops_only_expired_entries(self) -> None:
+        cache = OrderedDict(
+            [("old", (10.0, {"title": "Old"})), ("new", (30.0, {"title": "New"}))]
+        )
+        with (
+            patch.object(music_module, "_info_cache", cache),
+            patch.object(music_module.time_module, "monotonic", return_value=20.0),
+        ):
+            self.assertEqual(music_module._info_cache_sweep(), 1)
+
+        self.assertEqual(list(cache), ["new"])
+
+    def test_info_cache_drops_bulky_extractor_fields(self) -> None:
+        entry = {
+            "title": "Song",
+            "url": "https://example.test/a.webm",
+            "formats": [{"format_id": "251"}],
+            "subtitles": {"en": []},
+        }
+        playlist = {"title": "List", "entries": [entry, None], "thumbnails": []}
+
+        with patch.object(music_module, "_info_cache", OrderedDict()):
+            music_module._info_cache_set("list", playlist)
+            cached = music_module._info_cache_get("list")
+
+        self.assertEqual(
+            cached,
+            {
+                "title": "List",
+                "entries": [
+                    {"title": "Song", "url": "https://example.test/a.webm"},
+                    None,
+                ],
+            },
+        )
+        self.assertIn("formats", entry)
+
+    def test_ytdl_executor_is_recreated_after_unload(self) -> None:
+        executor = music_module._get_ytdl_executor()
+        self.assertIs(music_module._get_ytdl_executor(), executor)
+
+        music_module.Music(SimpleNamespace()).cog_unload()
+
+        replacement = music_module._get_ytdl_executor()
+        self.assertIsNot(replacement, executor)
+        self.assertEqual(replacement.submit(lambda: 1).result(timeout=1), 1)
+
+    def test_extraction_reuses_one_client_per_thread(self) -> None:
+        created: list[object] = []
+
+        class FakeYoutubeDL:
+            def __init__(self, params) -> None:
+                self.params = params
+                self.limits: list[object] = []
+                created.append(self)
+
+            def extract_info(self, url, *, download):
+                self.limits.append(self.params.get("playlistend"))
+                return {"title": url}
+
+        with (
+            patch.object(music_module, "_thread_ytdl_clients", threading.local()),
+            patch.object(music_module.youtube_dl, "YoutubeDL", FakeYoutubeDL),
+        ):
+            music_module._extract_info_sync("a", download=False, max_entries=5)
+            music_module._extract_info_sync("b", download=False)
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(
+            created[0].limits, [5, music_module.YTDL_OPTIONS.get("playlistend")]
+        )
+
+    def test_concurrent_lookups_share_one_extraction(self) -> None:
+        release = threading.Event()
+        calls: list[str] = []
+
+        def extract(url, *, download, max_entries=None):
+            calls.append(url)
+            release.wait(timeout=1)
+            return {"title": "Song", "url": "https://example.test/a.webm"}
+
+        async def scenario():
+            first = asyncio.create_task(music_module.YTDLSource.from_url("query"))
+            second = asyncio.create_task(music_module.YTDLSource.from_url("query"))
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(first, second)
+
+        with (
+            patch.object(music_module, "_info_cache", OrderedDict()),
+            patch.object(music_module, "_extract_info_sync", side_effect=extract),
+        ):
+            first, second = asyncio.run(scenario())
+
+        self.assertEqual(calls, ["query"])
+        self.assertEqual(first[0].title, "Song")
+        self.assertEqual(second[0].title, "Song")
+        self.assertIsInstance(first[0].original, music_module._DeferredAudioSource)
+        self.assertEqual(music_module._ytdl_inflight, {})
+
+    def test_concurrent_lookups_with_different_limits_do_not_share(self) -> None:
+        release = threading.Event()
+        limits: list[int] = []
+
+        def extract(url, *, download, max_entries=None):
+            limits.append(max_entries)
+            release.wait(timeout=1)
+            return {
+                "entries": [
+                    {"title": f"Song {index}", "url": f"https://example.test/{index}"}
+                    for index in range(max_entries)
+                ]
+            }
+
+        async def scenario():
+            smaller = asyncio.create_task(
+                music_module.YTDLSource.from_url("list", max_entries=2)
+            )
+            larger = asyncio.create_task(
+                music_module.YTDLSource.from_url("list", max_entries=5)
+            )
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(smaller, larger)
+
+        with (
+            patch.object(music_module, "_info_cache", OrderedDict()),
+            patch.object(music_module, "_extract_info_sync", side_effect=extract),
+        ):
+            smaller, larger = asyncio.run(scenario())
+
+        self.assertEqual(sorted(limits), [2, 5])
+        self.assertEqual(len(smaller), 2)
+        self.assertEqual(len(larger), 5)
+
+    def test_cached_playlist_serves_smaller_requests_and_aliases_videos(
+        self,
+    ) -> None:
+        playlist = {
+            "entries": [
+                {"title": f"Song {index}", "url": f"https://example.test/{index}"}
+                for index in range(3)
+            ]
+        }
+        video = {
+            "title": "Video",
+            "url": "https://example.test/video.webm",
+            "webpage_url": "https://www.youtube.com/watch?v=abc",
+        }
+        extract = Mock(side_effect=[playlist, dict(playlist), {"entries": [video]}])
+        from_url = music_module.YTDLSource.from_url
+
+        async def scenario():
+            first = await from_url("list", max_entries=3)
+            smaller = await from_url("list", max_entries=2)
+            larger = await from_url("list", max_entries=5)
+            await from_url("ytsearch1:video")
+            by_url = await from_url("https://www.youtube.com/watch?v=abc")
+            return first, smaller, larger, by_url
+
+        with (
+            patch.object(music_module, "_info_cache", OrderedDict()),
+            patch.object(music_module, "_extract_info_sync", extract),
+        ):
+            first, smaller, larger, by_url = asyncio.run(scenario())
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual([source.title for source in smaller], ["Song 0", "Song 1"])
+        self.assertEqual(len(larger), 3)
+        self.assertEqual([source.title for source in by_url], ["Video"])
+        self.assertEqual(extract.call_count, 3)
+
+    def test_concurrent_flat_probes_share_one_extraction(self) -> None:
+        release = threading.Event()
+        extract = Mock(
+            side_effect=lambda url: release.wait(timeout=1) and {"entries": []}
+        )
+
+        async def scenario():
+            probes = [
+                asyncio.create_task(music_module._probe_info_flat("ytsearch5:x"))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*probes)
+
+        with (
+            patch.object(music_module, "_info_cache", OrderedDict()),
+            patch.object(music_module, "_extract_flat_info_sync", extract),
+        ):
+            results = asyncio.run(scenario())
+
+        extract.assert_called_once_with("ytsearch5:x")
+        self.assertEqual(results, [{"entries": []}] * 3)
+
     def test_ffmpeg_options_include_seek(self) -> None:
         options = music_module.build_ffmpeg_options(stream=False, seek=12)
         self.assertIn("-ss 12", options["before_options"])
 
+    def test_ffmpeg_options_reuse_prebuilt_args_without_seek(self) -> None:
+        build = music_module.build_ffmpeg_options
+        self.assertIs(build(stream=True), build(stream=True))
+        self.assertIsNot(build(stream=True), build(stream=True, hls=True))
+        with_agent = build(stream=True, user_agent="Agent 1")
+        self.assertTrue(with_agent["before_options"].endswith(" -user_agent 'Agent 1'"))
+        self.assertIs(with_agent, build(stream=True, user_agent="Agent 1"))
+        self.assertIsNot(with_agent, build(stream=True, user_agent="Agent 2"))
+        self.assertIs(build(stream=False, user_agent="Agent 1"), build(stream=False))
+        seeking = build(stream=True, seek=7, user_agent="Agent 1")
+        self.assertEqual(
+            seeking["before_options"], f"-ss 7 {with_agent['before_options']}"
+        )
+
+    def test_ffmpeg_input_format_is_forced_only_for_direct_http_containers(
+        self,
+    ) -> None:
+        input_format = music_module._ffmpeg_input_format
+        self.assertEqual(input_format({"protocol": "https", "ext": "webm"}), "matroska")
+        self.assertEqual(input_format({"protocol": "https", "ext": "m4a"}), "mp4")
+        self.assertIsNone(input_format({"protocol": "m3u8_native", "ext": "opus"}))
+        self.assertIsNone(input_format({"protocol": "https", "ext": "mp3"}))
+
+        build = music_module.build_ffmpeg_options
+        forced = build(stream=True, input_format="matroska")
+        self.assertIs(forced, build(stream=True, input_format="matroska"))
+        self.assertTrue(forced["before_options"].startswith("-f matroska "))
+        seeking = build(stream=True, seek=5, input_format="mp4")
+        self.assertTrue(seeking["before_options"].startswith("-ss 5 -f mp4 "))
+        self.assertNotIn(
+            "-f ",
+            build(stream=True, hls=True, input_format="mp4")["before_options"],
+        )
+        self.assertNotIn(
+            "-f ", build(stream=False, input_format="mp4")["before_options"]
+        )
+
+    def test_hls_detection_is_protocol_based_for_any_extractor(self) -> None:
+        is_hls = music_module._is_hls_entry
+        self.assertTrue(is_hls({"extractor": "soundcloud", "protocol": "m3u8_native"}))
+        self.assertTrue(is_hls({"extractor": "youtube", "protocol": "m3u8"}))
+        self.assertFalse(is_hls({"extractor": "soundcloud", "protocol": "https"}))
+        self.assertNotIn(
+            "-reconnect_at_eof",
+            music_module.build_ffmpeg_options(stream=True, hls=True)["before_options"],
+        )
+
     def test_player_state_is_isolated_per_guild(self) -> None:
         root = music_module.Music(SimpleNamespace())
         first_message = SimpleNamespace(guild=SimpleNamespace(id=1))
@@ -67,6 +377,81 @@ class MusicHelperTests(unittest.TestCase):
         self.assertEqual(second.loop_mode, "off")
         self.assertEqual(root.loop_mode, "off")
 
+    def test_housekeeping_runs_inactivity_sweep_on_a_slower_cadence(self) -> None:
+        root = music_module.Music(SimpleNamespace())
+        player = root._player_for_message(SimpleNamespace(guild=SimpleNamespace(id=1)))
+        player._monitor_stalled_playback_once = AsyncMock()
+        player._check_for_inactivity_once = AsyncMock()
+
+        for _ in range(music_module._INACTIVITY_CHECK_EVERY_TICKS + 1):
+            asyncio.run(root.housekeeping_loop.coro(root))
+
+        self.assertEqual(
+            player._monitor_stalled_playback_once.await_count,
+            music_module._INACTIVITY_CHECK_EVERY_TICKS + 1,
+        )
+        self.assertEqual(player._check_for_inactivity_once.await_count, 2)
+
+    def test_housekeeping_isolates_one_guilds_failure(self) -> None:
+        root = music_module.Music(SimpleNamespace())
+        failing = root._player_for_message(SimpleNamespace(guild=SimpleNamespace(id=1)))
+        healthy = root._player_for_message(SimpleNamespace(guild=SimpleNamespace(id=2)))
+        for player in (failing, healthy):
+            player._monitor_stalled_playback_once = AsyncMock()
+            player._check_for_inactivity_once = AsyncMock()
+        failing._monitor_stalled_playback_once.side_effect = RuntimeError("boom")
+        failing._check_for_inactivity_once.side_effect = RuntimeError("boom")
+
+        with self.assertLogs(music_module.logger, level="ERROR") as logs:
+            asyncio.run(root.housekeeping_loop.coro(root))
+
+        healthy._monitor_stalled_playback_once.assert_awaited_once()
+        healthy._check_for_inactivity_once.assert_awaited_once()
+        self.assertEqual(len(logs.records), 2)
+
+    def test_background_send_is_referenced_until_it_finishes(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        channel = SimpleNamespace(send=AsyncMock())
+
+        async def scenario() -> None:
+            player._dispatch_channel_send(channel, content="hi")
+            self.assertEqual(len(player._background_sends), 1)
+            await asyncio.gather(*player._background_sends)
+
+        asyncio.run(scenario())
+
+        channel.send.assert_awaited_once()
+        self.assertEqual(player._background_sends, set())
+
+    def test_track_file_is_deleted_on_the_cleanup_thread(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory) / "track.webm"
+            file_path.write_bytes(b"audio")
+            track = music_module.QueuedTrack(
+                source=Mock(),
+                title="Track",
+                requester=SimpleNamespace(),
+                local_path=str(file_path),
+            )
+
+            player._cleanup_track_file(track)
+            music_module._cleanup_executor.submit(lambda: None).result(timeout=1)
+
+            self.assertFalse(file_path.exists())
+            self.assertIsNone(track.local_path)
+            track.source.cleanup.assert_called_once_with()
+
+    def test_after_playback_failure_is_logged(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        future = music_module.Future()
+        future.set_exception(RuntimeError("boom"))
+
+        with self.assertLogs(music_module.logger, level="ERROR") as logs:
+            player._log_after_playback_failure(future)
+
+        self.assertIn("boom", "\n".join(logs.output))
+
     def test_deferred_source_does_not_spawn_ffmpeg(self) -> None:
         source = music_module._DeferredAudioSource()
         self.assertEqual(source.read(), b"")
@@ -87,11 +472,334 @@ class MusicHelperTests(unittest.TestCase):
         self.assertTrue(refreshed)
         self.assertTrue(track.source_prepared)
         self.assertIsInstance(track.source, music_module._BufferedAudioSource)
-        self.assertEqual(track.source.source.original.source, track.stream_url)
+        # Unity volume plays FFmpeg output unscaled until the level changes.
+        self.assertEqual(track.source.source.source, track.stream_url)
+        self.assertEqual(track.source.volume, 1.0)
         track.source.volume = 0.5
         self.assertEqual(track.source.source.volume, 0.5)
+        self.assertEqual(track.source.source.original.source, track.stream_url)
         track.source.cleanup()
 
+    def test_prewarm_refreshes_stale_next_stream_before_current_ends(self) -> None:
+        player = music_module.Music(SimpleNamespace(loop=object()), _guild_id=1)
+        current = music_module.QueuedTrack(
+            source=Mock(), title="Current", requester=SimpleNamespace(), duration=20
+        )
+        queued = music_module.QueuedTrack(
+            source=music_module._DeferredAudioSource(),
+            title="Next",
+            requester=SimpleNamespace(),
+            stream_url="https://example.test/old.webm",
+            reload_query="https://example.test/watch",
+            prepared_at_monotonic=0.0,
+            source_prepared=False,
+        )
+        player.current = current
+        player.queue.append(queued)
+        fresh = SimpleNamespace(
+            url="https://example.test/new.webm",
+            user_agent="UA",
+            is_hls=False,
+            acodec="opus",
+            input_format="matroska",
+        )
+        from_url = AsyncMock(return_value=[fresh])
+
+        with patch.object(music_module.YTDLSource, "from_url", new=from_url):
+            asyncio.run(player._prewarm_next_track(current))
+
+        from_url.assert_awaited_once()
+        self.assertEqual(queued.stream_url, "https://example.test/new.webm")
+        self.assertEqual(queued.user_agent, "UA")
+        self.assertEqual(queued.acodec, "opus")
+        self.assertEqual(queued.input_format, "matroska")
+        self.assertFalse(player._next_track_needs_prewarm(queued))
+
+    def test_prewarm_covers_a_track_queued_after_playback_started(self) -> None:
+        player = music_module.Music(SimpleNamespace(loop=object()), _guild_id=1)
+        current = music_module.QueuedTrack(
+            source=Mock(), title="Current", requester=SimpleNamespace(), duration=20
+        )
+        queued = music_module.QueuedTrack(
+            source=music_module._DeferredAudioSource(),
+            title="Next",
+            requester=SimpleNamespace(),
+            stream_url="https://example.test/old.webm",
+            reload_query="https://example.test/watch",
+            prepared_at_monotonic=0.0,
+            source_prepared=False,
+        )
+        fresh = SimpleNamespace(
+            url="https://example.test/new.webm",
+            user_agent=None,
+            is_hls=False,
+            acodec="opus",
+            input_format="matroska",
+        )
+        from_url = AsyncMock(return_value=[fresh])
+
+        async def scenario() -> None:
+            player.current = current
+            player._mark_playback_started()
+            player._schedule_next_track_prewarm()
+            player.queue.append(queued)
+            await player._prewarm_task
+
+        with patch.object(music_module.YTDLSource, "from_url", new=from_url):
+            asyncio.run(scenario())
+
+        from_url.assert_awaited_once()
+        self.assertEqual(queued.stream_url, "https://example.test/new.webm")
+
+    def test_stopping_playback_cancels_a_pending_prewarm(self) -> None:
+        player = music_module.Music(SimpleNamespace(loop=object()), _guild_id=1)
+        player.current = music_module.QueuedTrack(
+            source=Mock(), title="Current", requester=SimpleNamespace(), duration=600
+        )
+
+        async def scenario() -> asyncio.Task:
+            player._mark_playback_started()
+            player._schedule_next_track_prewarm()
+            task = player._prewarm_task
+            await asyncio.sleep(0)
+            await player.stop_func(SimpleNamespace(id=1, guild=None, reply=AsyncMock()))
+            await asyncio.sleep(0)
+            return task
+
+        task = asyncio.run(scenario())
+
+        self.assertTrue(task.cancelled())
+        self.assertIsNone(player._prewarm_task)
+
+    def test_opus_stream_is_remuxed_only_at_unity_volume(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        track = music_module.QueuedTrack(
+            source=music_module._DeferredAudioSource(),
+            title="Track",
+            requester=SimpleNamespace(),
+            stream_url="https://example.test/audio.webm",
+            acodec="opus",
+        )
+
+        source = player._create_stream_track_source(track)
+        self.assertTrue(source.is_opus())
+        self.assertEqual(source.source.options["codec"], "copy")
+        player._record_played_opus_frame(b"\xfc")
+        self.assertAlmostEqual(player._played_audio_seconds, 0.02)
+        source.volume = 0.5
+        self.assertTrue(source.is_opus())
+        source.cleanup()
+
+        player._volume = 0.5
+        source = player._create_stream_track_source(track)
+        self.assertFalse(source.is_opus())
+        self.assertEqual(source.volume, 0.5)
+        source.cleanup()
+
+    def test_volume_change_moves_opus_passthrough_to_pcm(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        track = music_module.QueuedTrack(
+            source=music_module._DeferredAudioSource(),
+            title="Track",
+            requester=SimpleNamespace(),
+            stream_url="https://example.test/audio.webm",
+            acodec="opus",
+        )
+        track.source = player._create_stream_track_source(track)
+        voice_client = Mock()
+        voice_client.is_connected.return_value = True
+        voice_client.is_playing.return_value = True
+        voice_client.is_paused.return_value = False
+        voice_client.source = track.source
+        player.voice_client = voice_client
+        player.current = track
+        player._mark_playback_started(start_at=42)
+        message = SimpleNamespace(
+            id=1,
+            guild=None,
+            author=SimpleNamespace(voice=SimpleNamespace(channel=voice_client.channel)),
+            reply=AsyncMock(),
+        )
+
+        result = asyncio.run(player.set_volume_func(message, 0.5))
+
+        self.assertEqual(result.text, "Громкость 50%")
+        voice_client.stop.assert_called_once()
+        rebuilt = voice_client.play.call_args.args[0]
+        self.assertIsNot(player.current, track)
+        self.assertIs(player.current.source, rebuilt)
+        self.assertFalse(rebuilt.is_opus())
+        self.assertEqual(rebuilt.volume, 0.5)
+        self.assertTrue(
+            rebuilt.source.original.options["before_options"].startswith("-ss 42 ")
+        )
+        message.reply.assert_awaited_once()
+        self.assertIn(
+            "Громкость установлена", message.reply.call_args.kwargs["content"]
+        )
+        rebuilt.cleanup()
+        track.source.cleanup()
+
+    def test_unity_volume_during_opus_passthrough_reports_active_volume(
+        self,
+    ) -> None:
+        player = music_module.Music(SimpleNamespace())
+        track = music_module.QueuedTrack(
+            source=music_module._DeferredAudioSource(),
+            title="Track",
+            requester=SimpleNamespace(),
+            stream_url="https://example.test/audio.webm",
+            acodec="opus",
+        )
+        track.source = player._create_stream_track_source(track)
+        voice_client = Mock()
+        voice_client.is_connected.return_value = True
+        voice_client.source = track.source
+        player.voice_client = voice_client
+        player.current = track
+        message = SimpleNamespace(
+            id=1,
+            guild=None,
+            author=SimpleNamespace(voice=SimpleNamespace(channel=voice_client.channel)),
+            reply=AsyncMock(),
+        )
+
+        asyncio.run(player.set_volume_func(message, 1.0))
+
+        voice_client.stop.assert_not_called()
+        self.assertEqual(
+            message.reply.call_args.kwargs["content"], "Громкость установлена на 100%."
+        )
+        track.source.cleanup()
+
+    def test_skip_by_name_removes_first_matching_queued_track(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        titles = ["Intro", "Hello World", "Hello Again"]
+        for title in titles:
+            player.queue.append(
+                music_module.QueuedTrack(
+                    source=Mock(), title=title, requester=SimpleNamespace()
+                )
+            )
+        message = SimpleNamespace(id=1, guild=None, reply=AsyncMock())
+
+        result = asyncio.run(player.skip_by_name_func(message, "hello"))
+
+        self.assertEqual(result.text, "Удалено из очереди: Hello World")
+        self.assertEqual(
+            [track.title for track in player.queue], ["Intro", "Hello Again"]
+        )
+
+    def test_attachment_over_limit_is_rejected_before_writing(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        player._ensure_voice_client = AsyncMock(return_value=SimpleNamespace())
+        attachment = SimpleNamespace(
+            filename="song.mp3",
+            size=0,
+            url="https://cdn.example.test/song.mp3",
+            read=AsyncMock(return_value=b"x" * 16),
+        )
+        message = SimpleNamespace(id=1, guild=None, reply=AsyncMock())
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            patch.object(music_module, "MUSIC_ATTACHMENT_MAX_BYTES", 8),
+            patch.object(music_module, "MUSIC_DIRECTORY_PATH", Path(directory)),
+        ):
+            result = asyncio.run(player.play_attachment_func(message, attachment))
+            written = list(Path(directory).iterdir())
+
+        self.assertEqual(result.text, "Аудиофайл слишком большой")
+        self.assertEqual(written, [])
+        self.assertEqual(len(player.queue), 0)
+
+    def _requested_stream_mode(self, query: str) -> tuple[bool, str]:
+        player = music_module.Music(SimpleNamespace(loop=object()))
+        player._ensure_voice_client = AsyncMock(return_value=SimpleNamespace())
+        player._safe_reply_message = AsyncMock(return_value=None)
+        player._safe_reply = AsyncMock(return_value=True)
+        from_url = AsyncMock(side_effect=music_module.DownloadError("stop"))
+        message = SimpleNamespace(id=1, guild=None)
+
+        with patch.object(music_module.YTDLSource, "from_url", from_url):
+            asyncio.run(player.play_func(message, query))
+
+        status_text = player._safe_reply_message.await_args.kwargs["content"]
+        return from_url.await_args.kwargs["stream"], status_text
+
+    def test_soundcloud_queries_stream_by_default(self) -> None:
+        with patch.object(music_module, "MUSIC_SOUNDCLOUD_DOWNLOAD", False):
+            stream, status_text = self._requested_stream_mode(
+                "https://soundcloud.com/artist/track"
+            )
+        self.assertTrue(stream)
+        self.assertEqual(status_text, "Ищу трек...")
+
+    def test_soundcloud_download_setting_restores_download_first(self) -> None:
+        with patch.object(music_module, "MUSIC_SOUNDCLOUD_DOWNLOAD", True):
+            soundcloud = self._requested_stream_mode(
+                "https://soundcloud.com/artist/track"
+            )
+            other = self._requested_stream_mode("never gonna give you up")
+        self.assertEqual(soundcloud, (False, "Скачиваю трек с SoundCloud..."))
+        self.assertEqual(other, (True, "Ищу трек..."))
+
+    def test_opus_attachments_are_remuxed_instead_of_decoded(self) -> None:
+        codec_of = music_module._attachment_audio_codec
+        probe = AsyncMock(return_value=("vorbis", 112))
+
+        with patch.object(music_module.discord.FFmpegOpusAudio, "probe", new=probe):
+            self.assertEqual(asyncio.run(codec_of(Path("voice.OPUS"))), "opus")
+            self.assertEqual(asyncio.run(codec_of(Path("voice.ogg"))), "vorbis")
+            self.assertIsNone(asyncio.run(codec_of(Path("song.mp3"))))
+        probe.assert_awaited_once_with("voice.ogg")
+
+        player = music_module.Music(SimpleNamespace())
+        remuxed = player._create_local_track_source("voice.opus", acodec="opus")
+        self.assertTrue(remuxed.is_opus())
+        self.assertEqual(remuxed.options["codec"], "copy")
+        player._volume = 0.5
+        decoded = player._create_local_track_source("voice.opus", acodec="opus")
+        self.assertIsInstance(decoded, music_module.discord.PCMVolumeTransformer)
+
+    def test_volume_change_moves_local_opus_passthrough_to_pcm(self) -> None:
+        player = music_module.Music(SimpleNamespace())
+        voice_client = Mock()
+        voice_client.is_connected.return_value = True
+        voice_client.is_playing.return_value = False
+        voice_client.is_paused.return_value = True
+        message = SimpleNamespace(
+            id=1,
+            guild=None,
+            author=SimpleNamespace(voice=SimpleNamespace(channel=voice_client.channel)),
+            reply=AsyncMock(),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = str(Path(directory) / "voice.ogg")
+            Path(local_path).write_bytes(b"OggS")
+            track = music_module.QueuedTrack(
+                source=player._create_local_track_source(local_path, acodec="opus"),
+                title="voice.ogg",
+                requester=SimpleNamespace(),
+                local_path=local_path,
+                should_stream=False,
+                acodec="opus",
+            )
+            voice_client.source = track.source
+            player.voice_client = voice_client
+            player.current = track
+            player._mark_playback_started(start_at=7)
+
+            asyncio.run(player.set_volume_func(message, 1.5))
+
+        rebuilt = voice_client.play.call_args.args[0]
+        self.assertIs(player.current.source, rebuilt)
+        self.assertIsInstance(rebuilt, music_module.discord.PCMVolumeTransformer)
+        self.assertEqual(rebuilt.volume, 1.5)
+        self.assertTrue(rebuilt.original.options["before_options"].startswith("-ss 7 "))
+        voice_client.pause.assert_called_once()
+
     def test_buffered_source_masks_a_temporary_input_stall(self) -> None:
         release_second_frame = threading.Event()
         first_frame_read = threading.Event()
@@ -242,8 +950,10 @@ class MusicHelperTests(unittest.TestCase):
             uploader="Uploader",
             duration=600,
             local_path=None,
-            is_youtube_hls=False,
+            is_hls=False,
             user_agent="test-agent",
+            acodec="mp4a.40.2",
+            input_format=None,
         )
 
         with (
@@ -1,5 +1,7 @@
 from google.genai import types
 
+# All declarations share one Tool: Gemini accepts any number per Tool, and
+# wrapping each in its own Tool only bloats every request's config payload.
 tools = [
     types.Tool(
         function_declarations=[
@@ -16,27 +18,15 @@ tools = [
                     },
                     required=["song_name"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="stop_music",
                 description="Stops playback and clears the queue. Use without parameters.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="skip_music",
                 description="Skips the current track and plays the next one in the queue, if available.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="seek",
                 description="Seeks to a specific timestamp in the currently playing track.",
@@ -50,11 +40,7 @@ tools = [
                     },
                     required=["time"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="skip_music_by_name",
                 description="Removes the specified song from the queue by name.",
@@ -68,11 +54,7 @@ tools = [
                     },
                     required=["song_name"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="set_volume",
                 description="Sets the playback volume (0.0-5.0).",
@@ -86,78 +68,42 @@ tools = [
                     },
                     required=["level"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="summon",
                 description="Connects the bot to your voice channel or moves it there.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="disconnect",
                 description="Disconnects the bot from the voice channel and clears the queue.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="pause_music",
                 description="Pauses the currently playing track.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="resume_music",
                 description="Resumes playback if it was paused.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="now_playing",
                 description=(
                     "Returns information about the currently playing track "
                     "(title, duration, current progress)."
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="get_queue",
                 description="Returns the list of tracks currently in the queue.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="shuffle_queue",
                 description="Randomly shuffles the tracks currently in the queue.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="clear_queue",
                 description="Clears all tracks from the queue but leaves the currently playing track running.",
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="remove_from_queue",
                 description="Removes a specific track from the queue by its index (1-based).",
@@ -171,11 +117,7 @@ tools = [
                     },
                     required=["index"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="loop_mode",
                 description="Sets the loop mode for the player.",
@@ -192,11 +134,7 @@ tools = [
                     },
                     required=["mode"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="think",
                 description=(
@@ -218,11 +156,7 @@ tools = [
                     },
                     required=["reasoning"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="react_to_message",
                 description="Adds an emoji reaction to the user's current message.",
@@ -236,11 +170,7 @@ tools = [
                     },
                     required=["emoji"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="remember",
                 description=(
@@ -267,11 +197,7 @@ tools = [
                     },
                     required=["content"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="recall",
                 description=(
@@ -289,11 +215,7 @@ tools = [
                     },
                     required=["query"],
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="get_player_state",
                 description=(
@@ -302,18 +224,14 @@ tools = [
                     "queue. Prefer this over several separate calls when you need "
                     "situational awareness before acting."
                 ),
-            )
-        ],
-    ),
-    types.Tool(
-        function_declarations=[
+            ),
             types.FunctionDeclaration(
                 name="who_is_listening",
                 description=(
                     "List the (non-bot) members currently in the bot's voice "
                     "channel, so you know who is actually listening."
                 ),
-            )
+            ),
         ],
     ),
 ]